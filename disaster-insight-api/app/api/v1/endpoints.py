@@ -1,16 +1,35 @@
-from fastapi import APIRouter, HTTPException, File, UploadFile
+from fastapi import APIRouter, HTTPException, File, UploadFile, Request, Query
+from fastapi.responses import Response, StreamingResponse
+import asyncio
+import zipfile
 import pandas as pd
-from pydantic import BaseModel
+import uuid
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 # Your existing services
 from app.services.predictor import prediction_service
+from app.services.risk_features import to_risk_record
+from app.core.config import (
+    RISK_BATCH_MAX_SIZE,
+    REGIONAL_BATCH_MAX_SIZE,
+    FORECAST_CACHE_MAX_AGE,
+    CV_BATCH_MAX_IMAGES,
+    AGENT_LLM_TIMEOUT_SECONDS
+)
 
 # New agent + RAG services
-from app.services.agent_service import process_chat_message
-from app.services.rag_service import ingest_documents
+from app.services.agent_service import process_chat_message, chat_sessions, agent_executor, llm_backend
+from app.services.rag_service import ingestion_jobs, get_rag_stats
+from app.services.ingest_jobs import IngestionBusyError
+
+# Bulk (streamed) tweet classification
+from app.services.bulk_classifier import stream_bulk_classification
 
 # New CV service
-from app.services.cv_service import cv_service
+from app.services.cv_service import cv_service, cv_executor, extract_zip_images
+from app.services.cv_tiling import TileLimitError
+from app.services.executors import ExecutorBusyError
 
 # Existing schemas
 from . import schemas
@@ -45,6 +64,39 @@ def classify_tweet(request: schemas.TweetClassificationRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streams NDJSON while the request body is still being read.
+    The stock StreamingResponse listens on `receive` for disconnects, which
+    would swallow the upload chunks we are still consuming.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@router.post("/classify-tweet/bulk", response_class=NDJSONStreamingResponse)
+async def classify_tweet_bulk(request: Request):
+    """
+    Classifies a streamed NDJSON or JSON-array body of texts.
+    Items may be strings or {"text": ...} objects. Results are streamed back as
+    NDJSON lines: {"index", "label", "score"} or {"index", "error"}.
+    """
+    return NDJSONStreamingResponse(stream_bulk_classification(request.stream()))
+
+
+@router.get("/classify-tweet/stats")
+def classify_tweet_stats():
+    """
+    Reports micro-batching queue depth / batch-size statistics and result-cache
+    hit rates for the tweet classifier.
+    """
+    return prediction_service.get_nlp_stats()
+
+
 # ============================================================
 # 📌 2. Static Disaster Risk Prediction
 # ============================================================
@@ -54,23 +106,28 @@ def predict_risk(request: schemas.StaticRiskRequest):
     Predicts the static risk of a disaster event becoming high-impact.
     """
     try:
-        input_dict = request.model_dump()
-
-        key_mapping = {
-            "start_year": "Start Year",
-            "start_month": "Start Month",
-            "disaster_group": "Disaster Group",
-            "disaster_subgroup": "Disaster Subgroup",
-            "disaster_type": "Disaster Type",
-            "country": "Country",
-            "region": "Region"
-        }
+        record = to_risk_record(request.model_dump())
+        result = prediction_service.predict_static_risk_record(record)
+        return schemas.StaticRiskResponse(**result)
 
-        renamed_input = {key_mapping.get(k, k): v for k, v in input_dict.items()}
-        input_df = pd.DataFrame([renamed_input])
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Missing or invalid field: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        result = prediction_service.predict_static_risk(input_df)
-        return schemas.StaticRiskResponse(**result)
+
+@router.post("/predict-risk/batch", response_model=schemas.StaticRiskBatchResponse)
+def predict_risk_batch(requests: List[schemas.StaticRiskRequest]):
+    """
+    Scores many disaster events in one vectorized call.
+    Predictions are returned in input order.
+    """
+    if len(requests) > RISK_BATCH_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {RISK_BATCH_MAX_SIZE} items)")
+    try:
+        records = [to_risk_record(r.model_dump()) for r in requests]
+        results = prediction_service.predict_static_risk_batch(records)
+        return schemas.StaticRiskBatchResponse(predictions=results)
 
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Missing or invalid field: {e}")
@@ -78,21 +135,73 @@ def predict_risk(request: schemas.StaticRiskRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/predict-risk/stats")
+def predict_risk_stats():
+    """
+    Reports usage of the precomputed risk lookup table (when enabled).
+    """
+    return prediction_service.get_risk_stats()
+
+
 # ============================================================
 # 📌 3. Global Earthquake Forecast
 # ============================================================
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
 @router.get("/global-earthquake-forecast", response_model=schemas.GlobalForecastResponse)
-def get_global_forecast():
+def get_global_forecast(request: Request, periods: int = Query(60, ge=1, le=600)):
     """
     Retrieves the global forecast for significant earthquake frequency.
+    Responses are pre-serialized and carry an ETag; send it back in
+    If-None-Match to get a 304 when nothing changed.
+    """
+    try:
+        body, etag = prediction_service.get_global_forecast_json(periods=periods)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={FORECAST_CACHE_MAX_AGE}"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.post("/global-earthquake-forecast/custom", response_model=schemas.GlobalForecastResponse)
+def get_custom_global_forecast(request: schemas.ProphetForecastRequest):
+    """
+    Computes a forecast from the Prophet model for any horizon and frequency.
+    Lower `uncertainty_samples` trades interval precision for latency.
     """
     try:
-        forecast_data = prediction_service.get_global_forecast(periods=60)
+        forecast_data = prediction_service.forecast_global_earthquakes(
+            horizon=request.horizon,
+            freq=request.freq,
+            uncertainty_samples=request.uncertainty_samples
+        )
+        if isinstance(forecast_data, dict) and "error" in forecast_data:
+            raise HTTPException(status_code=503, detail=forecast_data["error"])
         return schemas.GlobalForecastResponse(forecast=forecast_data)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/global-earthquake-forecast/stats")
+def global_forecast_stats():
+    """
+    Reports hit rates of the on-demand Prophet forecast cache.
+    """
+    return prediction_service.prophet_cache.stats()
+
+
 # ============================================================
 # 📌 4. Regional Impact Prediction
 # ============================================================
@@ -109,14 +218,41 @@ def predict_regional_impact(request: schemas.RegionalImpactRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/predict-regional-impact/batch", response_model=schemas.RegionalImpactBatchResponse)
+def predict_regional_impact_batch(request: schemas.RegionalImpactBatchRequest):
+    """
+    Scores many labelled region-quarter rows in one model call.
+    Results are keyed by region.
+    """
+    if len(request.items) > REGIONAL_BATCH_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {REGIONAL_BATCH_MAX_SIZE} items)")
+    try:
+        rows = [item.model_dump() for item in request.items]
+        probabilities = prediction_service.predict_regional_impact_batch(rows)
+
+        predictions = {}
+        for item, probability in zip(request.items, probabilities):
+            predictions.setdefault(item.region, []).append(
+                {"quarter": item.quarter, "high_impact_probability": probability}
+            )
+        return schemas.RegionalImpactBatchResponse(predictions=predictions)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ============================================================
 # 📌 5. Chat Agent: Ask
 # ============================================================
 class ChatRequest(BaseModel):
     message: str
+    # Continue an earlier conversation; a new one is started when omitted
+    conversation_id: Optional[str] = Field(None, min_length=1, max_length=128)
 
 class ChatResponse(BaseModel):
     response: str
+    conversation_id: str
+    # Set when the conversation's earlier history was evicted ("idle" | "lru" | "memory")
+    context_reset: Optional[str] = None
 
 @router.post("/chat/ask", response_model=ChatResponse)
 async def ask_agent(request: ChatRequest):
@@ -125,32 +261,104 @@ async def ask_agent(request: ChatRequest):
     ✔ answer questions  
     ✔ call ML models  
     ✔ search PDF documents (RAG)  
+
+    Pass the returned `conversation_id` back to continue the same conversation;
+    each conversation keeps its own history. `context_reset` tells the client
+    when that history was evicted and the agent started over.
     """
+    conversation_id = request.conversation_id or uuid.uuid4().hex
+    context_reset = chat_sessions.eviction_reason(conversation_id) if request.conversation_id else None
     try:
-        response_text = await process_chat_message(request.message)
-        return {"response": response_text}
+        response_text = await process_chat_message(request.message, conversation_id)
+        return {"response": response_text, "conversation_id": conversation_id, "context_reset": context_reset}
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"The agent did not answer within {AGENT_LLM_TIMEOUT_SECONDS:g}s")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/chat/sessions/stats")
+def chat_session_stats():
+    """
+    Active conversations, their accounted history size, evictions,
+    the largest sessions, and the agent worker pool.
+    """
+    return {
+        "backend": llm_backend.name if llm_backend is not None else None,
+        "sessions": chat_sessions.stats(),
+        "executor": agent_executor.stats()
+    }
+
+
+@router.delete("/chat/sessions/{conversation_id}")
+def end_chat_session(conversation_id: str):
+    """
+    Ends a conversation and frees its history.
+    """
+    if not chat_sessions.discard(conversation_id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return {"conversation_id": conversation_id, "status": "ended"}
+
+
 # ============================================================
 # 📌 6. Chat Agent: Document Ingestion (RAG)
 # ============================================================
-@router.post("/chat/ingest-docs")
+@router.post("/chat/ingest-docs", status_code=202)
 async def ingest_knowledge_base():
     """
-    Reads PDFs in /documents and updates the Vector DB for RAG retrieval.
+    Starts a background job that syncs PDFs in /documents into the Vector DB
+    for RAG retrieval, and returns its job ID immediately. Only new or changed
+    PDFs are embedded; chunks of deleted PDFs are removed. Only one job runs at
+    a time (409 otherwise); queries keep using the current index meanwhile.
     """
     try:
-        ingest_documents()
+        job = ingestion_jobs.start(trigger="api")
         return {
-            "status": "success",
-            "message": "Documents processed and stored in Vector DB."
+            "status": "accepted",
+            "message": "Document ingestion started in the background.",
+            "job_id": job.job_id,
+            "status_url": f"/api/v1/chat/ingest-docs/jobs/{job.job_id}"
         }
+    except IngestionBusyError as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": str(e), "job_id": e.job_id,
+                    "status_url": f"/api/v1/chat/ingest-docs/jobs/{e.job_id}"}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/chat/ingest-docs/jobs")
+def list_ingestion_jobs():
+    """
+    Recent ingestion jobs, newest first.
+    """
+    return {"jobs": ingestion_jobs.list()}
+
+
+@router.get("/chat/ingest-docs/jobs/{job_id}")
+def get_ingestion_job(job_id: str):
+    """
+    Progress of one ingestion job: files done, chunks embedded, throughput,
+    errors, and the added / updated / removed report once it has finished.
+    """
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown ingestion job")
+    return job
+
+
+@router.get("/chat/knowledge-base/stats")
+def knowledge_base_stats():
+    """
+    Hit rates of the RAG query-embedding and retrieval caches.
+    """
+    return get_rag_stats()
+
+
 # ============================================================
 # 📌 7. Image-Based Damage Analysis (CV Model)
 # ============================================================
@@ -164,11 +372,108 @@ async def analyze_damage_image(file: UploadFile = File(...)):
 
     try:
         contents = await file.read()
-        result = cv_service.predict_damage(contents)
+        # Decode + inference run on the CV executor, keeping the event loop free
+        result = await cv_executor.run(cv_service.predict_damage, contents)
 
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
 
         return result
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/analyze-damage/batch")
+async def analyze_damage_batch(files: List[UploadFile] = File(...)):
+    """
+    Receives many image files and/or zip archives of images and returns one
+    Triage assessment per image, in upload order. A broken image only fails
+    its own entry.
+    """
+    images = []
+    for file in files:
+        contents = await file.read()
+        is_zip = file.content_type in ("application/zip", "application/x-zip-compressed") \
+            or (file.filename or "").lower().endswith(".zip")
+
+        if is_zip:
+            try:
+                images.extend(extract_zip_images(
+                    contents, CV_BATCH_MAX_IMAGES, len(images),
+                    already_bytes=sum(len(data) for _, data in images if data is not None)
+                ))
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"{file.filename} is not a valid zip archive")
+            except ValueError as e:
+                raise HTTPException(status_code=413, detail=str(e))
+        elif file.content_type and file.content_type.startswith("image/"):
+            images.append((file.filename, contents))
+        else:
+            raise HTTPException(status_code=400, detail=f"{file.filename} must be an image or a zip archive")
+
+        if len(images) > CV_BATCH_MAX_IMAGES:
+            raise HTTPException(status_code=413, detail=f"Too many images (max {CV_BATCH_MAX_IMAGES})")
+
+    try:
+        results = await cv_executor.run(cv_service.predict_damage_batch, images)
+        return {"status": "success", "count": len(results), "results": results}
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/analyze-damage/tiled")
+async def analyze_damage_tiled(
+    file: UploadFile = File(...),
+    tile_size: int = Query(None, ge=32, le=4096, description="Source pixels per tile side (default CV_TILE_SIZE)"),
+    overlap: float = Query(None, ge=0.0, lt=0.9, description="Fraction of overlap between neighbouring tiles")
+):
+    """
+    Sliding-window analysis for large aerial / UAV images (orthomosaics, TIFF or JPEG).
+    Returns a per-tile label grid, confidence grid and damage heatmap, plus the
+    Triage assessment of the most urgent tile.
+    """
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+
+    options = {}
+    if tile_size is not None:
+        options["tile_size"] = tile_size
+    if overlap is not None:
+        options["overlap"] = overlap
+
+    try:
+        # Hand over the spooled upload file itself, so large images are not copied into memory
+        await file.seek(0)
+        result = await cv_executor.run(cv_service.predict_damage_tiled, file.file, **options)
+
+        if "error" in result:
+            raise HTTPException(status_code=500, detail=result["error"])
+
+        return result
+    except TileLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/analyze-damage/stats")
+def analyze_damage_stats():
+    """
+    Reports CV executor load (running / queued jobs, rejected requests)
+    ONNX Runtime session pool usage and near-duplicate cache hit rate.
+    """
+    return {
+        "executor": cv_executor.stats(),
+        "session_pool": cv_service.get_stats(),
+        "dedupe_cache": cv_service.get_dedupe_stats()
+    }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Dict, List, Literal, Optional
 
 # --- Tweet Classification ---
 class TweetClassificationRequest(BaseModel):
@@ -37,6 +37,9 @@ class StaticRiskRequest(BaseModel):
 class StaticRiskResponse(BaseModel):
     high_risk_probability: float
 
+class StaticRiskBatchResponse(BaseModel):
+    predictions: List[StaticRiskResponse]
+
 # --- Global Forecast ---
 class GlobalForecastItem(BaseModel):
     ds: str
@@ -47,6 +50,13 @@ class GlobalForecastItem(BaseModel):
 class GlobalForecastResponse(BaseModel):
     forecast: List[GlobalForecastItem]
 
+class ProphetForecastRequest(BaseModel):
+    horizon: int = Field(60, ge=1, le=600, example=24)
+    # pandas offset aliases: D=daily, W=weekly, M=month end, MS=month start, Q=quarter end, Y=year end
+    freq: Literal["D", "W", "M", "MS", "Q", "QS", "Y", "YS"] = Field("M", example="M")
+    # Fewer samples = faster but noisier yhat_lower / yhat_upper; 0 skips intervals entirely
+    uncertainty_samples: int = Field(1000, ge=0, le=5000, example=200)
+
 # --- Regional Impact Prediction ---
 class RegionalImpactRequest(BaseModel):
     event_count: int = Field(..., example=5)
@@ -54,4 +64,19 @@ class RegionalImpactRequest(BaseModel):
     avg_magnitude: float = Field(..., example=5.5)
 
 class RegionalImpactResponse(BaseModel):
-    high_impact_probability: float
\ No newline at end of file
+    high_impact_probability: float
+
+class RegionalImpactBatchItem(RegionalImpactRequest):
+    region: str = Field(..., example="Indonesia")
+    quarter: Optional[str] = Field(None, example="2025-Q3")
+
+class RegionalImpactBatchRequest(BaseModel):
+    items: List[RegionalImpactBatchItem] = Field(..., min_length=1)
+
+class RegionalImpactBatchResult(BaseModel):
+    quarter: Optional[str] = None
+    high_impact_probability: float
+
+class RegionalImpactBatchResponse(BaseModel):
+    # region -> one result per submitted row for that region, in input order
+    predictions: Dict[str, List[RegionalImpactBatchResult]]
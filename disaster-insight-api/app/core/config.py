@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Define the base directory of the API project (disaster_api)
@@ -10,9 +11,13 @@ MODELS_DIR = BASE_DIR / "models"
 # Create specific paths for each model component
 # Model 1: NLP Classifier
 NLP_MODEL_PATH = MODELS_DIR / "01_fine-tuned_disaster_tweet_classifier"
+NLP_ONNX_PATH = NLP_MODEL_PATH / "model.onnx"
+NLP_ONNX_INT8_PATH = NLP_MODEL_PATH / "model.int8.onnx"
 
 # Model 2: Static Risk Predictor
 RISK_PIPELINE_PATH = MODELS_DIR / "02_disaster_risk_predictor" / "xgb_risk_prediction_pipeline.joblib"
+# Optional precomputed lookup table (built by scripts/build_risk_table.py or at startup)
+RISK_TABLE_PATH = MODELS_DIR / "02_disaster_risk_predictor" / "risk_lookup_table.npz"
 
 # Model 3: Global Earthquake Forecaster
 GLOBAL_FORECAST_MODEL_PATH = MODELS_DIR / "03_earthquake_forecaster" / "prophet_earthquake_model.json"
@@ -20,4 +25,124 @@ GLOBAL_FORECAST_MODEL_PATH = MODELS_DIR / "03_earthquake_forecaster" / "prophet_
 GLOBAL_FORECAST_DATA_PATH = MODELS_DIR / "03_earthquake_forecaster" / "earthquake_frequency_forecast.csv" 
 
 # Model 4: Regional Impact Forecaster
-REGIONAL_FORECAST_MODEL_PATH = MODELS_DIR / "04_regional_impact_forecaster" / "xgb_regional_impact_forecaster.joblib"
\ No newline at end of file
+REGIONAL_FORECAST_MODEL_PATH = MODELS_DIR / "04_regional_impact_forecaster" / "xgb_regional_impact_forecaster.joblib"
+
+# RAG embedder: ONNX export of all-MiniLM-L6-v2 (built by scripts/export_rag_embedder.py or on first use)
+RAG_EMBEDDER_DIR = MODELS_DIR / "06_rag_embedder"
+RAG_EMBEDDER_ONNX_PATH = RAG_EMBEDDER_DIR / "model.onnx"
+RAG_EMBEDDER_ONNX_INT8_PATH = RAG_EMBEDDER_DIR / "model.int8.onnx"
+
+# --- Inference Tuning ---
+# NLP micro-batching: concurrent /classify-tweet calls are grouped into one padded batch
+NLP_BATCHING_ENABLED = os.environ.get("NLP_BATCHING_ENABLED", "true").lower() == "true"
+NLP_BATCH_MAX_SIZE = int(os.environ.get("NLP_BATCH_MAX_SIZE", 32))
+NLP_BATCH_MAX_WAIT_MS = float(os.environ.get("NLP_BATCH_MAX_WAIT_MS", 10))
+
+# Bulk classification: texts per tokenizer/model batch when streaming large uploads
+NLP_BULK_CHUNK_SIZE = int(os.environ.get("NLP_BULK_CHUNK_SIZE", 64))
+NLP_BULK_MAX_ITEM_CHARS = int(os.environ.get("NLP_BULK_MAX_ITEM_CHARS", 1_000_000))  # per NDJSON line / array element
+
+# NLP inference backend: "pytorch" (transformers pipeline), "onnx" or "onnx-int8" (onnxruntime)
+NLP_BACKEND = os.environ.get("NLP_BACKEND", "pytorch").lower()
+
+# NLP result cache: keyed by a hash of the normalized text (URLs, RT prefixes, case, whitespace)
+NLP_CACHE_ENABLED = os.environ.get("NLP_CACHE_ENABLED", "true").lower() == "true"
+NLP_CACHE_MAX_SIZE = int(os.environ.get("NLP_CACHE_MAX_SIZE", 10000))
+NLP_CACHE_TTL_SECONDS = float(os.environ.get("NLP_CACHE_TTL_SECONDS", 3600))
+
+# Risk scoring: encode features straight into NumPy using the fitted pipeline (verified at load)
+RISK_FAST_PATH_ENABLED = os.environ.get("RISK_FAST_PATH_ENABLED", "true").lower() == "true"
+RISK_BATCH_MAX_SIZE = int(os.environ.get("RISK_BATCH_MAX_SIZE", 10000))
+# Risk lookup table: precompute country x disaster type x subgroup x month for the current year
+RISK_TABLE_ENABLED = os.environ.get("RISK_TABLE_ENABLED", "false").lower() == "true"
+# Values of the other categorical columns covered by the table (defaults: what the agent's risk tool sends)
+RISK_TABLE_CONTEXT = {
+    "Disaster Group": [v.strip() for v in os.environ.get("RISK_TABLE_DISASTER_GROUPS", "Natural").split(",") if v.strip()],
+    "Region": [v.strip() for v in os.environ.get("RISK_TABLE_REGIONS", "Asia").split(",") if v.strip()]
+}
+
+# Regional impact: max rows per /predict-regional-impact/batch call
+REGIONAL_BATCH_MAX_SIZE = int(os.environ.get("REGIONAL_BATCH_MAX_SIZE", 50000))
+
+# Global forecast: Cache-Control max-age (seconds) for the pre-serialized /global-earthquake-forecast payloads
+FORECAST_CACHE_MAX_AGE = int(os.environ.get("FORECAST_CACHE_MAX_AGE", 3600))
+
+# Damage assessment batches: images per session.run, decode threads, upload limits
+CV_BATCH_SIZE = int(os.environ.get("CV_BATCH_SIZE", 16))
+CV_DECODE_WORKERS = int(os.environ.get("CV_DECODE_WORKERS", 4))
+CV_BATCH_MAX_IMAGES = int(os.environ.get("CV_BATCH_MAX_IMAGES", 500))
+CV_MAX_ZIP_ENTRY_BYTES = int(os.environ.get("CV_MAX_ZIP_ENTRY_BYTES", 50 * 1024 * 1024))
+CV_MAX_ZIP_TOTAL_BYTES = int(os.environ.get("CV_MAX_ZIP_TOTAL_BYTES", 512 * 1024 * 1024))  # decompressed, per request
+
+# CV inference executor: keeps PIL decode + ONNX runs off the event loop; full queue -> 503
+CV_INFERENCE_WORKERS = int(os.environ.get("CV_INFERENCE_WORKERS", 2))
+CV_INFERENCE_QUEUE_SIZE = int(os.environ.get("CV_INFERENCE_QUEUE_SIZE", 16))
+
+# CV preprocessing: reduced-scale JPEG decode, and/or uint8 model input with /255 folded into the graph
+CV_FAST_PREPROCESS = os.environ.get("CV_FAST_PREPROCESS", "false").lower() == "true"
+CV_UINT8_INPUT = os.environ.get("CV_UINT8_INPUT", "false").lower() == "true"
+CV_MODEL_PRECISION = os.environ.get("CV_MODEL_PRECISION", "fp32").lower()  # fp32 | int8
+
+# CV ONNX Runtime session: pool size and SessionOptions (0 threads = onnxruntime default,
+# or cores / pool size when the pool has more than one session)
+CV_SESSION_POOL_SIZE = int(os.environ.get("CV_SESSION_POOL_SIZE", 1))
+CV_ORT_INTRA_OP_THREADS = int(os.environ.get("CV_ORT_INTRA_OP_THREADS", 0))
+CV_ORT_INTER_OP_THREADS = int(os.environ.get("CV_ORT_INTER_OP_THREADS", 0))
+CV_ORT_GRAPH_OPTIMIZATION = os.environ.get("CV_ORT_GRAPH_OPTIMIZATION", "all").lower()  # disabled | basic | extended | all
+CV_ORT_EXECUTION_MODE = os.environ.get("CV_ORT_EXECUTION_MODE", "sequential").lower()  # sequential | parallel
+CV_ORT_ENABLE_CPU_MEM_ARENA = os.environ.get("CV_ORT_ENABLE_CPU_MEM_ARENA", "true").lower() == "true"
+CV_ORT_ENABLE_MEM_PATTERN = os.environ.get("CV_ORT_ENABLE_MEM_PATTERN", "true").lower() == "true"
+
+# CV near-duplicate cache (opt-in): images within CV_DEDUPE_MAX_DISTANCE bits (dHash) reuse a stored result.
+# Similar-looking photos of different buildings can share a verdict, so only enable it for re-upload heavy feeds.
+CV_DEDUPE_ENABLED = os.environ.get("CV_DEDUPE_ENABLED", "false").lower() == "true"
+CV_DEDUPE_MAX_SIZE = int(os.environ.get("CV_DEDUPE_MAX_SIZE", 200000))
+CV_DEDUPE_MAX_DISTANCE = int(os.environ.get("CV_DEDUPE_MAX_DISTANCE", 4))
+
+# Tiled (sliding-window) mode for large aerial / UAV images
+CV_TILE_SIZE = int(os.environ.get("CV_TILE_SIZE", 224))  # source pixels per tile side
+CV_TILE_OVERLAP = float(os.environ.get("CV_TILE_OVERLAP", 0.25))
+CV_TILE_MAX_TILES = int(os.environ.get("CV_TILE_MAX_TILES", 20000))
+CV_TILE_MAX_DECODE_PIXELS = int(os.environ.get("CV_TILE_MAX_DECODE_PIXELS", 64_000_000))
+
+# On-demand Prophet forecasts: memoized per (horizon, freq, uncertainty_samples)
+PROPHET_CACHE_MAX_SIZE = int(os.environ.get("PROPHET_CACHE_MAX_SIZE", 64))
+PROPHET_CACHE_TTL_SECONDS = float(os.environ.get("PROPHET_CACHE_TTL_SECONDS", 0))  # 0 = no expiry
+
+# --- RAG Ingestion ---
+# PDF text extraction runs in a process pool; chunks are embedded and upserted in fixed-size batches
+RAG_INGEST_WORKERS = int(os.environ.get("RAG_INGEST_WORKERS", min(4, os.cpu_count() or 1)))
+RAG_EMBED_BATCH_SIZE = int(os.environ.get("RAG_EMBED_BATCH_SIZE", 128))
+
+# Embedding backend for the knowledge base: sentence-transformers | onnx | onnx-int8
+RAG_EMBEDDING_BACKEND = os.environ.get("RAG_EMBEDDING_BACKEND", "sentence-transformers").lower()
+RAG_ONNX_BATCH_SIZE = int(os.environ.get("RAG_ONNX_BATCH_SIZE", 32))
+
+# Retrieval: vector | lexical | hybrid (BM25 fast path for keyword queries, otherwise BM25 + vector fused by RRF)
+RAG_RETRIEVAL_MODE = os.environ.get("RAG_RETRIEVAL_MODE", "hybrid").lower()
+RAG_LEXICAL_MAX_TERMS = int(os.environ.get("RAG_LEXICAL_MAX_TERMS", 4))  # longer queries always use vectors too
+RAG_HYBRID_CANDIDATES = int(os.environ.get("RAG_HYBRID_CANDIDATES", 10))
+RAG_RRF_K = int(os.environ.get("RAG_RRF_K", 60))
+
+# Query-embedding and retrieval caches (retrieval results are dropped whenever ingestion changes the store)
+RAG_CACHE_ENABLED = os.environ.get("RAG_CACHE_ENABLED", "true").lower() == "true"
+RAG_QUERY_CACHE_MAX_SIZE = int(os.environ.get("RAG_QUERY_CACHE_MAX_SIZE", 1024))
+RAG_QUERY_CACHE_TTL_SECONDS = float(os.environ.get("RAG_QUERY_CACHE_TTL_SECONDS", 0))  # 0 = no expiry
+
+# --- Chat Agent ---
+# One chat session per conversation_id; idle sessions expire and the least recently used are evicted
+AGENT_MAX_SESSIONS = int(os.environ.get("AGENT_MAX_SESSIONS", 1000))
+AGENT_SESSION_IDLE_TTL_SECONDS = float(os.environ.get("AGENT_SESSION_IDLE_TTL_SECONDS", 1800))  # 0 = never
+AGENT_SESSION_MAX_TOTAL_MB = float(os.environ.get("AGENT_SESSION_MAX_TOTAL_MB", 256))  # history budget, 0 = unlimited
+# LLM backend: gemini | fake (deterministic local stand-in that calls the tools, for offline load tests)
+AGENT_LLM_BACKEND = os.environ.get("AGENT_LLM_BACKEND", "gemini").lower()
+AGENT_LLM_TIMEOUT_SECONDS = float(os.environ.get("AGENT_LLM_TIMEOUT_SECONDS", 60))
+# Agent turns (LLM round trips + tool calls) run on their own bounded thread pool
+AGENT_LLM_WORKERS = int(os.environ.get("AGENT_LLM_WORKERS", 16))
+AGENT_LLM_QUEUE_SIZE = int(os.environ.get("AGENT_LLM_QUEUE_SIZE", 64))
+AGENT_FAKE_LATENCY_MS = float(os.environ.get("AGENT_FAKE_LATENCY_MS", 200))  # per simulated model call
+
+# --- Startup ---
+# Load all models in parallel in the background at startup; when false, models load on first use
+MODEL_WARMUP_ON_STARTUP = os.environ.get("MODEL_WARMUP_ON_STARTUP", "true").lower() == "true"
+MODEL_WARMUP_WORKERS = int(os.environ.get("MODEL_WARMUP_WORKERS", 4))
@@ -1,6 +1,22 @@
+import asyncio
+import functools
 import os
-import google.generativeai as genai
+import threading
+import time
 from dotenv import load_dotenv
+from app.core.config import (
+    AGENT_MAX_SESSIONS,
+    AGENT_SESSION_IDLE_TTL_SECONDS,
+    AGENT_SESSION_MAX_TOTAL_MB,
+    AGENT_LLM_BACKEND,
+    AGENT_LLM_TIMEOUT_SECONDS,
+    AGENT_LLM_WORKERS,
+    AGENT_LLM_QUEUE_SIZE,
+    AGENT_FAKE_LATENCY_MS
+)
+from app.services.agent_sessions import ChatSessionPool
+from app.services.executors import BoundedExecutor, ExecutorBusyError
+from app.services.llm_backends import GeminiBackend, FakeLLMBackend
 
 # Import your tools
 from app.services.agent_tools import (
@@ -13,46 +29,100 @@ from app.services.agent_tools import (
 # Load environment variables
 load_dotenv()
 
-# 1. Configure API Key
+# 1. API Key
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
-if not GOOGLE_API_KEY:
-    print("🚨 AGENT ERROR: GOOGLE_API_KEY not found in environment.")
-else:
-    # Configure the SDK
-    genai.configure(api_key=GOOGLE_API_KEY)
+class TurnCancelledError(TimeoutError):
+    """Raised inside a turn that timed out or whose client went away."""
+
+
+# Deadline / cancel flag of the turn running on the current worker thread
+_turn = threading.local()
+
+def _check_turn():
+    cancelled = getattr(_turn, "cancelled", None)
+    if cancelled is not None and (cancelled.is_set() or time.monotonic() > _turn.deadline):
+        raise TurnCancelledError("chat turn timed out or was cancelled")
+
+def _guarded(tool):
+    """Checks the turn's deadline before every tool call, so a timed-out turn stops between calls."""
+    @functools.wraps(tool)
+    def wrapper(*args, **kwargs):
+        _check_turn()
+        return tool(*args, **kwargs)
+    return wrapper
 
 # 2. Define the Tool List
 tools_list = [
-    get_disaster_risk_assessment,
-    analyze_emergency_message,
-    search_safety_protocols,
-    get_global_earthquake_forecast
+    _guarded(tool) for tool in (
+        get_disaster_risk_assessment,
+        analyze_emergency_message,
+        search_safety_protocols,
+        get_global_earthquake_forecast
+    )
 ]
 
-# 3. Initialize Model
-# We use 'gemini-1.5-pro' because it worked in your test and is excellent at reasoning.
+# 3. Initialize the LLM backend
+def _build_llm_backend():
+    """Gemini by default; the fake backend answers locally (no API key or network) for load tests."""
+    if AGENT_LLM_BACKEND == "fake":
+        print(f"⚠️ Agent is using the local fake LLM backend ({AGENT_FAKE_LATENCY_MS} ms per model call)")
+        return FakeLLMBackend(tools_list, latency_seconds=AGENT_FAKE_LATENCY_MS / 1000)
+    return GeminiBackend(tools_list, model_name='gemini-2.5-flash', api_key=GOOGLE_API_KEY)
+
 try:
-    model = genai.GenerativeModel(
-        model_name='gemini-2.5-flash', 
-        tools=tools_list
-    )
-    
-    # 4. Start Chat Session with Automatic Tool Calling
-    chat_session = model.start_chat(enable_automatic_function_calling=True)
-    print("✅ Agent Service Initialized with gemini-1.5-pro")
+    llm_backend = _build_llm_backend()
+    print(f"✅ Agent Service Initialized with the {llm_backend.name} backend")
 
 except Exception as e:
-    print(f"❌ Failed to initialize Gemini Model: {e}")
-    model = None
-    chat_session = None
+    print(f"❌ Failed to initialize LLM backend ({AGENT_LLM_BACKEND}): {e}")
+    llm_backend = None
+
+# 4. One Chat Session per conversation
+chat_sessions = ChatSessionPool(
+    lambda: llm_backend.start_chat(),
+    max_sessions=AGENT_MAX_SESSIONS,
+    idle_ttl_seconds=AGENT_SESSION_IDLE_TTL_SECONDS,
+    max_total_bytes=int(AGENT_SESSION_MAX_TOTAL_MB * 1024 * 1024)
+)
+
+# LLM round trips and tool calls block, so turns run on worker threads, not the event loop
+agent_executor = BoundedExecutor(AGENT_LLM_WORKERS, AGENT_LLM_QUEUE_SIZE, name="agent-llm")
 
-async def process_chat_message(user_message: str):
+def _run_turn(conversation_id: str, prompt: str, deadline: float, cancelled: threading.Event) -> str:
     """
-    Main entry point. Sends user text to Gemini.
-    Gemini handles the Tool Calling loop automatically.
+    One user turn on a worker thread. Stops at the next tool call once
+    `deadline` passes or `cancelled` is set, and never keeps the exchange of a
+    turn the client did not get: the session history is rolled back instead.
     """
-    if not chat_session:
+    # Turns of the same conversation are serialized; others run independently
+    entry = chat_sessions.acquire(conversation_id)
+    _turn.deadline, _turn.cancelled = deadline, cancelled
+    try:
+        with entry.lock:
+            _check_turn()
+            checkpoint = list(entry.session.history)
+            try:
+                # Each LLM request may only use what is left of the turn's budget
+                remaining = max(0.1, deadline - time.monotonic())
+                text = llm_backend.send_message(entry.session, prompt, timeout=remaining)
+                _check_turn()
+            except Exception:
+                entry.session.history = checkpoint
+                raise
+            chat_sessions.record_turn(conversation_id, entry)
+    finally:
+        _turn.deadline, _turn.cancelled = None, None
+        chat_sessions.release(entry)
+    return text
+
+async def process_chat_message(user_message: str, conversation_id: str):
+    """
+    Main entry point. Sends user text to the LLM within the conversation's own session.
+    The backend handles the Tool Calling loop; raises ExecutorBusyError when all
+    agent workers are taken and asyncio.TimeoutError after AGENT_LLM_TIMEOUT_SECONDS.
+    """
+    if llm_backend is None:
         return "System Error: AI Model is not initialized. Check server logs."
 
     try:
@@ -65,10 +135,22 @@ async def process_chat_message(user_message: str):
             "If a risk is High or Critical, advise immediate caution."
         )
         
-        # Send message
-        response = chat_session.send_message(f"{system_instruction}\n\nUser: {user_message}")
-        
-        return response.text
+        # Send message. On timeout (or client disconnect) a turn still waiting for a
+        # worker is dropped; one already running is told to stop at its next tool call.
+        deadline = time.monotonic() + AGENT_LLM_TIMEOUT_SECONDS
+        cancelled = threading.Event()
+        try:
+            return await asyncio.wait_for(
+                agent_executor.run(
+                    _run_turn, conversation_id, f"{system_instruction}\n\nUser: {user_message}", deadline, cancelled
+                ),
+                timeout=AGENT_LLM_TIMEOUT_SECONDS
+            )
+        except BaseException:
+            cancelled.set()
+            raise
+    except (ExecutorBusyError, asyncio.TimeoutError, asyncio.CancelledError):
+        raise
     except Exception as e:
         import traceback
         print("\n❌ GEMINI RUNTIME ERROR:")
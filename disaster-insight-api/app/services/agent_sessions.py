@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_history_bytes(session) -> int:
+    """
+    Approximate memory held by a chat session's history: the serialized size of
+    each turn (protobuf ByteSize when available, text length otherwise).
+    """
+    total = 0
+    for content in getattr(session, "history", None) or []:
+        pb = getattr(content, "_pb", content)
+        try:
+            total += pb.ByteSize()
+        except Exception:
+            total += len(str(content))
+    return total
+
+
+class _SessionEntry:
+    def __init__(self, session):
+        self.session = session
+        self.lock = threading.Lock()  # one turn at a time per conversation
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.turns = 0
+        self.bytes = 0
+        self.active = 0  # requests holding this entry (acquired, not yet released)
+
+
+class ChatSessionPool:
+    """
+    Per-conversation chat sessions with LRU eviction.
+
+    Sessions idle for longer than `idle_ttl_seconds` are dropped, and the least
+    recently used ones go first when there are more than `max_sessions` or
+    their accounted history exceeds `max_total_bytes`. Sessions in use by a
+    request are never evicted (the pool may briefly exceed its limits instead),
+    and evicted conversation IDs are remembered so the API can tell a client
+    its context was reset. Each entry carries its own lock, so different
+    conversations never wait on each other.
+    """
+
+    def __init__(self, factory, max_sessions: int = 1000, idle_ttl_seconds: float = 1800,
+                 max_total_bytes: int = None):
+        self._factory = factory
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_ttl_seconds = idle_ttl_seconds if idle_ttl_seconds and idle_ttl_seconds > 0 else None
+        self.max_total_bytes = max_total_bytes if max_total_bytes and max_total_bytes > 0 else None
+
+        self._entries = OrderedDict()  # conversation_id -> _SessionEntry, least recently used first
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self._created = 0
+        self._evicted = {"idle": 0, "lru": 0, "memory": 0}
+        self._recently_evicted = OrderedDict()  # conversation_id -> reason, oldest first
+        self._max_remembered = max(1000, self.max_sessions)
+
+    def acquire(self, conversation_id: str) -> _SessionEntry:
+        """
+        Returns the conversation's entry, creating a session on first use.
+        The entry is pinned against eviction until release() is called.
+        """
+        with self._lock:
+            self._expire_idle()
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                entry = _SessionEntry(self._factory())
+                self._entries[conversation_id] = entry
+                self._recently_evicted.pop(conversation_id, None)
+                self._created += 1
+                while len(self._entries) > self.max_sessions:
+                    if not self._evict_least_recent("lru", keep=conversation_id):
+                        break
+            self._entries.move_to_end(conversation_id)
+            entry.last_used = time.monotonic()
+            entry.active += 1
+            return entry
+
+    def release(self, entry: _SessionEntry):
+        """Unpins an entry returned by acquire(); call once per acquire(), also on errors."""
+        with self._lock:
+            entry.active -= 1
+
+    def record_turn(self, conversation_id: str, entry: _SessionEntry):
+        """Updates the entry's accounting after a turn and enforces the memory budget."""
+        size = estimate_history_bytes(entry.session)
+        with self._lock:
+            entry.turns += 1
+            entry.last_used = time.monotonic()
+            if self._entries.get(conversation_id) is entry:
+                self._total_bytes += size - entry.bytes
+            entry.bytes = size
+            if self.max_total_bytes is not None:
+                # Never evict the conversation that just spoke
+                while self._total_bytes > self.max_total_bytes:
+                    if not self._evict_least_recent("memory", keep=conversation_id):
+                        break
+
+    def discard(self, conversation_id: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(conversation_id, None)
+            if entry is None:
+                return False
+            self._total_bytes -= entry.bytes
+            return True
+
+    def eviction_reason(self, conversation_id: str):
+        """Why the conversation's session was dropped ("idle" | "lru" | "memory"), or None."""
+        with self._lock:
+            if conversation_id in self._entries:
+                return None
+            return self._recently_evicted.get(conversation_id)
+
+    def _expire_idle(self):
+        if self.idle_ttl_seconds is None:
+            return
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        expired = []
+        for conversation_id, entry in self._entries.items():
+            if entry.last_used > cutoff:
+                break
+            if not entry.active:
+                expired.append(conversation_id)
+        for conversation_id in expired:
+            self._evict(conversation_id, "idle")
+
+    def _evict_least_recent(self, reason: str, keep: str) -> bool:
+        """Evicts the least recently used entry not in use; False if there is none."""
+        for conversation_id, entry in self._entries.items():
+            if conversation_id != keep and not entry.active:
+                self._evict(conversation_id, reason)
+                return True
+        return False
+
+    def _evict(self, conversation_id: str, reason: str):
+        entry = self._entries.pop(conversation_id)
+        self._total_bytes -= entry.bytes
+        self._evicted[reason] += 1
+        self._recently_evicted[conversation_id] = reason
+        while len(self._recently_evicted) > self._max_remembered:
+            self._recently_evicted.popitem(last=False)
+        if reason != "idle":
+            print(f"♻️ Chat session {conversation_id} evicted ({reason}, {entry.turns} turns); its context was reset")
+
+    def stats(self, top: int = 10) -> dict:
+        with self._lock:
+            self._expire_idle()
+            now = time.monotonic()
+            largest = sorted(self._entries.items(), key=lambda item: item[1].bytes, reverse=True)[:top]
+            return {
+                "sessions": len(self._entries),
+                "active": sum(1 for entry in self._entries.values() if entry.active),
+                "max_sessions": self.max_sessions,
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+                "history_bytes": self._total_bytes,
+                "max_total_bytes": self.max_total_bytes,
+                "created": self._created,
+                "evicted": dict(self._evicted),
+                "largest": [
+                    {
+                        "conversation_id": conversation_id,
+                        "turns": entry.turns,
+                        "history_bytes": entry.bytes,
+                        "idle_seconds": round(now - entry.last_used, 1)
+                    }
+                    for conversation_id, entry in largest
+                ]
+            }
@@ -1,4 +1,3 @@
-import pandas as pd
 from datetime import datetime
 from app.services.predictor import prediction_service
 from app.services.rag_service import query_knowledge_base
@@ -11,7 +10,7 @@ def get_disaster_risk_assessment(region: str, disaster_type: str):
         region: The country or city name (e.g., "Pakistan", "Japan").
         disaster_type: The type of disaster (e.g., "Earthquake", "Flood").
     """
-    # 1. We construct a DataFrame mimicking your ML model's training schema.
+    # 1. We construct a record mimicking your ML model's training schema.
     # Since the LLM won't know exact GDP/Year columns, we use reasonable defaults 
     # or "Average" values for the model to run successfully.
     current_year = datetime.now().year
@@ -20,7 +19,7 @@ def get_disaster_risk_assessment(region: str, disaster_type: str):
     # NOTE: In a production app, you would look up real GDP/Year data for the 'region'.
     # For this demo/scholarship, using representative defaults is acceptable 
     # to demonstrate the "Tool Calling" architecture functionality.
-    input_data = pd.DataFrame([{
+    input_data = {
         'Disaster Group': 'Natural',
         'Disaster Subgroup': 'Meteorological', # Simplified default
         'Disaster Type': disaster_type,
@@ -28,10 +27,11 @@ def get_disaster_risk_assessment(region: str, disaster_type: str):
         'Region': 'Asia', # Simplified default
         'Start Year': current_year,
         'Start Month': current_month
-    }])
+    }
     
     try:
-        result = prediction_service.predict_static_risk(input_data)
+        # Served from the precomputed risk table when enabled, live inference otherwise
+        result = prediction_service.predict_static_risk_record(input_data)
         prob = result.get('high_risk_probability', 0)
         
         risk_label = "Low"
@@ -0,0 +1,128 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Groups single-item requests arriving from many threads into one batch call.
+
+    A background worker waits for the first item, then keeps collecting until
+    either `max_batch_size` items are queued or `max_wait_ms` has elapsed, and
+    runs them through `batch_fn` in one go. Each caller gets its own result.
+    """
+
+    def __init__(self, batch_fn, max_batch_size: int = 32, max_wait_ms: float = 10.0, name: str = "batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        # --- Stats ---
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._failed_batches = 0
+        self._max_queue_depth = 0
+        self._total_wait_s = 0.0
+        self._total_run_s = 0.0
+        self._batch_sizes = Counter()
+
+    def submit(self, item) -> Future:
+        """Queues one item and returns a Future resolved with its result."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._max_queue_depth = max(self._max_queue_depth, depth)
+        return future
+
+    def __call__(self, item, timeout: float = None):
+        return self.submit(item).result(timeout=timeout)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=f"{self.name}-worker", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        max_wait_s = self.max_wait_ms / 1000.0
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + max_wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining <= 0:
+                        batch.append(self._queue.get_nowait())
+                    else:
+                        batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        # Drop requests whose caller already gave up
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        items = [item for item, _, _ in batch]
+        started = time.perf_counter()
+        wait_s = sum(started - enqueued for _, _, enqueued in batch)
+
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"{self.name}: batch function returned {len(results)} results for {len(items)} items"
+                )
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            failed = True
+        else:
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+            failed = False
+
+        run_s = time.perf_counter() - started
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._failed_batches += int(failed)
+            self._total_wait_s += wait_s
+            self._total_run_s += run_s
+            self._batch_sizes[len(batch)] += 1
+
+    def stats(self) -> dict:
+        """Queue depth and batch-size statistics for tuning the batching window."""
+        with self._stats_lock:
+            batches = self._batches
+            items = self._items
+            return {
+                "name": self.name,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "batches_processed": batches,
+                "items_processed": items,
+                "failed_batches": self._failed_batches,
+                "avg_batch_size": round(items / batches, 2) if batches else 0.0,
+                "avg_queue_wait_ms": round(self._total_wait_s / items * 1000, 3) if items else 0.0,
+                "avg_batch_run_ms": round(self._total_run_s / batches * 1000, 3) if batches else 0.0,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+            }
@@ -0,0 +1,102 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i if in into is it its me my of on or our should
+so than that the their them then there these they this to was we what when where which who why will
+with you your
+""".split())
+
+
+def tokenize(text: str):
+    """Lower-cased alphanumeric terms without stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-process BM25 inverted index over knowledge-base chunks.
+
+    Postings map term -> {chunk id: term frequency}; per-chunk lengths and
+    terms are kept so chunks can be removed again. add() replaces an existing
+    chunk with the same ID, so replaying updates is harmless.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}  # term -> {doc_id: tf}
+        self._docs = {}  # doc_id -> (length, terms)
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, ids, documents):
+        with self._lock:
+            for doc_id, text in zip(ids, documents):
+                self._remove_one(doc_id)
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[doc_id] = tf
+                self._docs[doc_id] = (length, tuple(counts))
+                self._total_length += length
+
+    def remove(self, ids):
+        with self._lock:
+            for doc_id in ids:
+                self._remove_one(doc_id)
+
+    def _remove_one(self, doc_id):
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return
+        length, terms = entry
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, n: int = 10):
+        """
+        Returns (terms, [(doc_id, score, matched_terms)]) for the top `n` chunks,
+        where matched_terms is how many distinct query terms the chunk contains.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            n_docs = len(self._docs)
+            if not terms or not n_docs:
+                return terms, []
+            avg_length = self._total_length / n_docs
+            scores, matched = {}, Counter()
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    length = self._docs[doc_id][0]
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+                    matched[doc_id] += 1
+        top = heapq.nlargest(n, scores.items(), key=lambda item: item[1])
+        return terms, [(doc_id, score, matched[doc_id]) for doc_id, score in top]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "chunks": len(self._docs),
+                "terms": len(self._postings),
+                "avg_chunk_terms": round(self._total_length / len(self._docs), 1) if self._docs else 0.0
+            }
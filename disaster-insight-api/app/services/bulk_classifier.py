@@ -0,0 +1,206 @@
+import codecs
+import json
+from typing import AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import NLP_BULK_CHUNK_SIZE, NLP_BULK_MAX_ITEM_CHARS
+from app.services.predictor import prediction_service
+
+_decoder = json.JSONDecoder()
+
+
+class BulkInputError(ValueError):
+    """Raised when the uploaded body is not valid NDJSON or a JSON array."""
+
+
+def _item_to_text(item):
+    """Accepts either a bare string or an object with a "text" field."""
+    if isinstance(item, str):
+        text = item
+    elif isinstance(item, dict) and isinstance(item.get("text"), str):
+        text = item["text"]
+    else:
+        raise ValueError('each item must be a string or an object with a "text" string')
+    if not text.strip():
+        raise ValueError("text must not be empty")
+    return text
+
+
+async def _iter_decoded(byte_chunks: AsyncIterator[bytes]):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in byte_chunks:
+        if chunk:
+            yield decoder.decode(chunk)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def _iter_ndjson(first: str, chunks, max_item_chars: int):
+    buffer = first
+    line_no = 0
+
+    def parse(line):
+        try:
+            return _item_to_text(json.loads(line)), None
+        except Exception as e:
+            return None, f"line {line_no}: {e}"
+
+    while True:
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield parse(line)
+        # An unterminated line must not pull the rest of the upload into memory
+        if len(buffer) > max_item_chars:
+            raise BulkInputError(f"line {line_no + 1} is longer than {max_item_chars} characters")
+        try:
+            buffer += await chunks.__anext__()
+        except StopAsyncIteration:
+            break
+
+    if buffer.strip():
+        line_no += 1
+        yield parse(buffer)
+
+
+async def _iter_json_array(first: str, chunks, max_item_chars: int):
+    # `first` starts with "[". Elements are decoded one at a time with raw_decode,
+    # so only the current element is ever held in memory; an element that is still
+    # incomplete after `max_item_chars` characters is rejected instead of buffered
+    # (and re-decoded) until EOF.
+    buffer = first.lstrip()[1:]
+    exhausted = False
+    expect_value = True
+    index = 0
+
+    async def fill():
+        nonlocal buffer, exhausted
+        if len(buffer) > max_item_chars:
+            raise BulkInputError(f"array element {index} is longer than {max_item_chars} characters or invalid")
+        try:
+            buffer += await chunks.__anext__()
+        except StopAsyncIteration:
+            exhausted = True
+
+    while True:
+        buffer = buffer.lstrip()
+        if not buffer:
+            if exhausted:
+                raise BulkInputError("unexpected end of JSON array")
+            await fill()
+            continue
+
+        if expect_value:
+            if buffer[0] == "]" and index == 0:
+                return
+            try:
+                item, end = _decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise BulkInputError(f"invalid JSON at array element {index}")
+                await fill()
+                continue
+            # A value ending exactly at the buffer edge may be a truncated number
+            if end == len(buffer) and not exhausted:
+                await fill()
+                continue
+            buffer = buffer[end:]
+            try:
+                yield _item_to_text(item), None
+            except ValueError as e:
+                yield None, f"element {index}: {e}"
+            index += 1
+            expect_value = False
+        else:
+            if buffer[0] == ",":
+                buffer = buffer[1:]
+                expect_value = True
+            elif buffer[0] == "]":
+                return
+            else:
+                raise BulkInputError(f"expected ',' or ']' after array element {index - 1}")
+
+
+async def iter_bulk_texts(byte_chunks: AsyncIterator[bytes], max_item_chars: int = NLP_BULK_MAX_ITEM_CHARS):
+    """
+    Incrementally parses an NDJSON or JSON-array body.
+    Yields (text, error) tuples; exactly one of the two is None.
+    Raises BulkInputError once a single item exceeds `max_item_chars`.
+    """
+    chunks = _iter_decoded(byte_chunks).__aiter__()
+    first = ""
+    while not first.strip():
+        if len(first) > max_item_chars:
+            raise BulkInputError("no JSON content found")
+        try:
+            first += await chunks.__anext__()
+        except StopAsyncIteration:
+            return
+
+    if first.lstrip().startswith("["):
+        parser = _iter_json_array(first, chunks, max_item_chars)
+    else:
+        parser = _iter_ndjson(first, chunks, max_item_chars)
+
+    async for entry in parser:
+        yield entry
+
+
+def _line(payload: dict) -> bytes:
+    return (json.dumps(payload) + "\n").encode("utf-8")
+
+
+async def stream_bulk_classification(byte_chunks: AsyncIterator[bytes], chunk_size: int = NLP_BULK_CHUNK_SIZE):
+    """
+    Classifies a streamed upload chunk by chunk and yields one NDJSON line per input.
+    Each line carries the input `index` plus either `label`/`score` or `error`.
+    """
+    chunk_size = max(1, chunk_size)
+    # (index, text, error) in input order; invalid items ride along so output order is preserved
+    pending = []
+    pending_texts = 0
+    index = 0
+
+    async def flush():
+        nonlocal pending_texts
+        texts = [text for _, text, error in pending if error is None]
+        results, batch_error = [], None
+        if texts:
+            try:
+                results = await run_in_threadpool(prediction_service.predict_tweet_classification_batch, texts)
+            except Exception as e:
+                batch_error = str(e)
+
+        lines = []
+        result_iter = iter(results)
+        for i, _, error in pending:
+            if error is None:
+                error = batch_error
+            if error is not None:
+                lines.append(_line({"index": i, "error": error}))
+            else:
+                r = next(result_iter)
+                lines.append(_line({"index": i, "label": r["label"], "score": float(r["score"])}))
+        pending.clear()
+        pending_texts = 0
+        return b"".join(lines)
+
+    try:
+        async for text, error in iter_bulk_texts(byte_chunks):
+            pending.append((index, text, error))
+            index += 1
+            if error is None:
+                pending_texts += 1
+            if pending_texts >= chunk_size or len(pending) >= chunk_size * 4:
+                yield await flush()
+    except BulkInputError as e:
+        if pending:
+            yield await flush()
+        yield _line({"error": f"Malformed input: {e}"})
+        return
+
+    if pending:
+        yield await flush()
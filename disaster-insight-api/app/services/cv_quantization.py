@@ -0,0 +1,135 @@
+import numpy as np
+from pathlib import Path
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    QuantFormat,
+    QuantType,
+    quantize_static
+)
+
+CALIBRATION_METHODS = {
+    "minmax": CalibrationMethod.MinMax,
+    "entropy": CalibrationMethod.Entropy,
+    "percentile": CalibrationMethod.Percentile,
+}
+
+
+def find_images(directory, extensions, limit: int = None):
+    """Image files under `directory` (recursive), sorted so runs are reproducible."""
+    paths = sorted(p for p in Path(directory).rglob("*") if p.suffix.lower() in extensions)
+    return paths[:limit] if limit else paths
+
+
+def iter_image_batches(paths, decode, batch_size: int = 16):
+    """
+    Yields (paths, float32 NHWC batch) with the serving normalization (1./255).
+    `decode` turns image bytes into 224x224 RGB uint8 pixels; unreadable files are skipped.
+    """
+    batch_paths, arrays = [], []
+    for path in paths:
+        try:
+            arrays.append(decode(Path(path).read_bytes()))
+        except Exception as e:
+            print(f"⚠️ Skipping {path}: {e}")
+            continue
+        batch_paths.append(path)
+        if len(arrays) == batch_size:
+            yield batch_paths, np.stack(arrays).astype(np.float32) / 255.0
+            batch_paths, arrays = [], []
+    if arrays:
+        yield batch_paths, np.stack(arrays).astype(np.float32) / 255.0
+
+
+class ImageCalibrationReader(CalibrationDataReader):
+    """Feeds preprocessed local images to the static quantization calibrator."""
+
+    def __init__(self, paths, decode, input_name: str, batch_size: int = 16):
+        self._batches = iter_image_batches(paths, decode, batch_size)
+        self.input_name = input_name
+        self.images_seen = 0
+
+    def get_next(self):
+        batch = next(self._batches, None)
+        if batch is None:
+            return None
+        self.images_seen += len(batch[0])
+        return {self.input_name: batch[1]}
+
+
+def quantize_cv_static(src_path, dst_path, image_paths, decode, input_name: str,
+                       method: str = "minmax", per_channel: bool = True, batch_size: int = 16):
+    """
+    Writes a statically int8-quantized copy of the CV model (QDQ format).
+    Activation ranges are calibrated on `image_paths`, so they should look like
+    production traffic (all five damage classes, real photo sizes).
+    """
+    if method not in CALIBRATION_METHODS:
+        raise ValueError(f"method must be one of {sorted(CALIBRATION_METHODS)}")
+    if not image_paths:
+        raise ValueError("no calibration images found")
+
+    reader = ImageCalibrationReader(image_paths, decode, input_name, batch_size)
+    print(f"Quantizing CV model to int8 ({method}, per-channel: {per_channel}): {dst_path}")
+    quantize_static(
+        str(src_path),
+        str(dst_path),
+        reader,
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=per_channel,
+        calibrate_method=CALIBRATION_METHODS[method]
+    )
+    print(f"✅ int8 quantization complete ({reader.images_seen} calibration images)")
+
+
+def compare_cv_models(reference, candidate, batches, class_indices: dict):
+    """
+    Accuracy regression between two CV sessions on the same inputs.
+    `reference` / `candidate` are callables mapping a float NHWC batch to class
+    probabilities. Returns top-1 agreement plus, per class (by reference
+    prediction), the mean confidence of each model and the drift between them.
+    """
+    labels = {int(k): v for k, v in class_indices.items()}
+    per_class = {i: {"count": 0, "agree": 0, "ref_conf": 0.0, "cand_conf": 0.0, "drift": []} for i in labels}
+    disagreements = {}
+    total = agree = 0
+
+    for _, batch in batches:
+        ref_probs = np.asarray(reference(batch), dtype=np.float64)
+        cand_probs = np.asarray(candidate(batch), dtype=np.float64)
+        for ref_row, cand_row in zip(ref_probs, cand_probs):
+            ref_top, cand_top = int(ref_row.argmax()), int(cand_row.argmax())
+            bucket = per_class.setdefault(ref_top, {"count": 0, "agree": 0, "ref_conf": 0.0, "cand_conf": 0.0, "drift": []})
+            bucket["count"] += 1
+            bucket["ref_conf"] += ref_row[ref_top]
+            bucket["cand_conf"] += cand_row[ref_top]
+            bucket["drift"].append(abs(ref_row[ref_top] - cand_row[ref_top]))
+            total += 1
+            if ref_top == cand_top:
+                bucket["agree"] += 1
+                agree += 1
+            else:
+                key = f"{labels.get(ref_top, ref_top)} -> {labels.get(cand_top, cand_top)}"
+                disagreements[key] = disagreements.get(key, 0) + 1
+
+    classes = {}
+    for idx, bucket in sorted(per_class.items()):
+        n = bucket["count"]
+        drift = np.asarray(bucket["drift"]) if n else np.zeros(1)
+        classes[labels.get(idx, str(idx))] = {
+            "samples": n,
+            "top1_agreement": bucket["agree"] / n if n else None,
+            "mean_confidence_reference": bucket["ref_conf"] / n if n else None,
+            "mean_confidence_candidate": bucket["cand_conf"] / n if n else None,
+            "mean_abs_drift": float(drift.mean()) if n else None,
+            "max_abs_drift": float(drift.max()) if n else None,
+        }
+
+    return {
+        "samples": total,
+        "top1_agreement": agree / total if total else 1.0,
+        "per_class": classes,
+        "disagreements": disagreements,
+    }
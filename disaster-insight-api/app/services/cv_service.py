@@ -1,58 +1,254 @@
 import json
+import threading
+import zipfile
 import numpy as np
-import onnxruntime as ort
 from PIL import Image
 from io import BytesIO
-from app.core.config import BASE_DIR
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import (
+    BASE_DIR,
+    CV_BATCH_SIZE,
+    CV_DECODE_WORKERS,
+    CV_MAX_ZIP_ENTRY_BYTES,
+    CV_MAX_ZIP_TOTAL_BYTES,
+    CV_INFERENCE_WORKERS,
+    CV_INFERENCE_QUEUE_SIZE,
+    CV_FAST_PREPROCESS,
+    CV_UINT8_INPUT,
+    CV_MODEL_PRECISION,
+    CV_SESSION_POOL_SIZE,
+    CV_ORT_INTRA_OP_THREADS,
+    CV_ORT_INTER_OP_THREADS,
+    CV_ORT_GRAPH_OPTIMIZATION,
+    CV_ORT_EXECUTION_MODE,
+    CV_ORT_ENABLE_CPU_MEM_ARENA,
+    CV_ORT_ENABLE_MEM_PATTERN,
+    CV_DEDUPE_ENABLED,
+    CV_DEDUPE_MAX_SIZE,
+    CV_DEDUPE_MAX_DISTANCE,
+    CV_TILE_SIZE,
+    CV_TILE_OVERLAP,
+    CV_TILE_MAX_TILES,
+    CV_TILE_MAX_DECODE_PIXELS
+)
+from app.services.executors import BoundedExecutor
+from app.services.cv_tiling import TileLimitError, iter_tiles, open_within_budget, tile_positions
+from app.services.image_dedupe import PerceptualHashCache, dhash
+from app.services.onnx_runtime import SessionPool, build_session_options, default_intra_op_threads
+from app.services.model_registry import model_registry
 
 # Paths
 MODEL_DIR = BASE_DIR / "models" / "05_visual_damage_classifier"
 MODEL_PATH = MODEL_DIR / "disaster_cv_model.onnx"
+# Static int8 quantization of the same model (built by scripts/quantize_cv_model.py)
+MODEL_INT8_PATH = MODEL_DIR / "disaster_cv_model_int8.onnx"
+# Same graphs with a uint8 input; the 1/255 normalization runs inside ONNX Runtime
+MODEL_UINT8_PATH = MODEL_DIR / "disaster_cv_model_uint8.onnx"
+MODEL_INT8_UINT8_PATH = MODEL_DIR / "disaster_cv_model_int8_uint8.onnx"
 CLASS_INDICES_PATH = MODEL_DIR / "class_indices.json"
 
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp")
+IMAGE_SIZE = (224, 224)
+
+# Used to pick the most urgent tile in tiled mode
+PRIORITY_RANK = {"CRITICAL (RED)": 4, "HIGH (ORANGE)": 3, "MEDIUM (YELLOW)": 2, "LOW (GREEN)": 1}
+NO_DAMAGE_LABEL = "0_no_damage"
+
+
+def build_uint8_input_model(src_path, dst_path):
+    """
+    Writes a copy of the CV model that takes uint8 NHWC pixels: a Cast + Div(255)
+    is prepended to the graph, so clients skip the float conversion entirely.
+    Div (not Mul by 1/255) keeps results bit-identical to the float path.
+    """
+    import onnx
+    from onnx import helper, numpy_helper, TensorProto
+
+    model = onnx.load(str(src_path))
+    graph = model.graph
+    initializer_names = {init.name for init in graph.initializer}
+    original = next(i for i in graph.input if i.name not in initializer_names)
+
+    uint8_input = helper.make_tensor_value_info(original.name + "_uint8", TensorProto.UINT8, None)
+    uint8_input.type.tensor_type.shape.CopyFrom(original.type.tensor_type.shape)
+    scale = numpy_helper.from_array(np.array(255.0, dtype=np.float32), name=original.name + "_scale")
+    cast = helper.make_node("Cast", [uint8_input.name], [original.name + "_float"], to=TensorProto.FLOAT)
+    # The Div output takes over the old input's name, so the rest of the graph is untouched
+    div = helper.make_node("Div", [original.name + "_float", scale.name], [original.name])
+
+    graph.initializer.append(scale)
+    nodes = [cast, div] + list(graph.node)
+    del graph.node[:]
+    graph.node.extend(nodes)
+    inputs = [uint8_input] + [i for i in graph.input if i.name != original.name]
+    del graph.input[:]
+    graph.input.extend(inputs)
+
+    onnx.checker.check_model(model)
+    onnx.save(model, str(dst_path))
+    print(f"✅ uint8-input CV model written to {dst_path}")
+
+
+def extract_zip_images(zip_bytes: bytes, max_images: int, already_counted: int = 0,
+                       max_total_bytes: int = CV_MAX_ZIP_TOTAL_BYTES, already_bytes: int = 0):
+    """
+    Returns [(name, bytes)] for the image entries of a zip archive, in archive order.
+    Oversized entries are returned as (name, None) so they are reported, not decoded.
+    `already_counted` images / `already_bytes` bytes from earlier uploads count
+    towards `max_images` / `max_total_bytes`. The declared sizes are checked
+    before anything is decompressed, and every read is bounded, since the
+    sizes in the archive's headers can lie.
+    """
+    too_large = ValueError(f"Archive expands beyond the {max_total_bytes // (1024 * 1024)} MB upload limit")
+    with zipfile.ZipFile(BytesIO(zip_bytes)) as archive:
+        entries = [
+            info for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+        if already_counted + len(entries) > max_images:
+            raise ValueError(f"Too many images (max {max_images})")
+        declared = sum(info.file_size for info in entries if info.file_size <= CV_MAX_ZIP_ENTRY_BYTES)
+        if already_bytes + declared > max_total_bytes:
+            raise too_large
+
+        images, total = [], already_bytes
+        for info in entries:
+            if info.file_size > CV_MAX_ZIP_ENTRY_BYTES:
+                images.append((info.filename, None))
+                continue
+            with archive.open(info) as entry:
+                data = entry.read(CV_MAX_ZIP_ENTRY_BYTES + 1)
+            if len(data) > CV_MAX_ZIP_ENTRY_BYTES:
+                images.append((info.filename, None))
+                continue
+            total += len(data)
+            if total > max_total_bytes:
+                raise too_large
+            images.append((info.filename, data))
+    return images
+
 
 class DamageAssessmentService:
     def __init__(self):
-        self.session = None
         self.class_indices = None
         self.input_name = None
-        self._load_resources()
+        # Loaded on first use (or by the startup warm-up)
+        self._session = model_registry.register("damage_classifier", self._load_resources)
+        self.max_model_batch = None  # set at load time; 1 if the exported graph has a fixed batch dim
+        self._decode_pool = ThreadPoolExecutor(max_workers=CV_DECODE_WORKERS, thread_name_prefix="cv-decode")
+
+        # Preprocessing options
+        self.fast_preprocess = CV_FAST_PREPROCESS
+        self.uint8_input = CV_UINT8_INPUT
+        self.precision = CV_MODEL_PRECISION
+        self.model_file = None  # the .onnx actually served, set at load time
+        self._buffers = threading.local()  # per-thread reusable NHWC input buffer
+
+        # Near-duplicate images (re-uploads, re-encodes, resized copies) reuse a stored triage result
+        self.dedupe = (
+            PerceptualHashCache(max_size=CV_DEDUPE_MAX_SIZE, max_distance=CV_DEDUPE_MAX_DISTANCE)
+            if CV_DEDUPE_ENABLED else None
+        )
+
+    @property
+    def session(self):
+        return self._session.get()
 
     def _load_resources(self):
-        """Load ONNX model and classes once at startup."""
+        """Load ONNX model and classes once; load errors are recorded by the model registry."""
         print("📸 Loading ONNX Computer Vision Model...")
         try:
-            # Load ONNX model
-            self.session = ort.InferenceSession(
-                str(MODEL_PATH),
+            model_path, uint8_path = MODEL_PATH, MODEL_UINT8_PATH
+            if self.precision == "int8":
+                if MODEL_INT8_PATH.exists():
+                    model_path, uint8_path = MODEL_INT8_PATH, MODEL_INT8_UINT8_PATH
+                else:
+                    # Static quantization needs calibration images, so it can't be built here
+                    print(f"⚠️ {MODEL_INT8_PATH.name} not found (run scripts/quantize_cv_model.py); serving fp32")
+
+            if self.uint8_input:
+                if not uint8_path.exists():
+                    build_uint8_input_model(model_path, uint8_path)
+                model_path = uint8_path
+
+            # Load ONNX model: a small pool of sessions so several inferences can run at once
+            sess_options = build_session_options(
+                intra_op_threads=CV_ORT_INTRA_OP_THREADS or default_intra_op_threads(CV_SESSION_POOL_SIZE),
+                inter_op_threads=CV_ORT_INTER_OP_THREADS,
+                graph_optimization=CV_ORT_GRAPH_OPTIMIZATION,
+                execution_mode=CV_ORT_EXECUTION_MODE,
+                enable_cpu_mem_arena=CV_ORT_ENABLE_CPU_MEM_ARENA,
+                enable_mem_pattern=CV_ORT_ENABLE_MEM_PATTERN
+            )
+            session = SessionPool(
+                model_path,
+                size=CV_SESSION_POOL_SIZE,
+                sess_options=sess_options,
                 providers=["CPUExecutionProvider"]
             )
-            print("✅ ONNX model loaded")
+            self.model_file = model_path.name
+            print(f"✅ ONNX model {model_path.name} loaded ({session.size} session(s), "
+                  f"intra-op threads: {sess_options.intra_op_num_threads or 'default'})")
 
             # Cache input tensor name
-            self.input_name = self.session.get_inputs()[0].name
+            model_input = session.get_inputs()[0]
+            self.input_name = model_input.name
+            batch_dim = model_input.shape[0] if model_input.shape else None
+            self.max_model_batch = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
 
             # Load class mapping
             with open(CLASS_INDICES_PATH, "r") as f:
                 self.class_indices = json.load(f)
             print(f"✅ Class indices loaded: {self.class_indices}")
+            return session
 
         except Exception as e:
             print(f"❌ Error loading CV model: {e}")
+            raise
+
+    def _decode_image(self, image_bytes: bytes):
+        """
+        Decodes to RGB 224x224 uint8 pixels (same resize as TF).
+        In fast mode JPEGs are decoded at a reduced scale (1/2 .. 1/8) by
+        libjpeg itself, so a 12 MP photo never exists at full resolution.
+        """
+        img = Image.open(BytesIO(image_bytes))
+        if self.fast_preprocess and img.format == "JPEG":
+            img.draft("RGB", IMAGE_SIZE)
+        img = img.convert("RGB").resize(IMAGE_SIZE)
+        return np.asarray(img)
+
+    def _input_buffer(self, batch_size: int):
+        """
+        Per-thread input tensor, reused across requests and grown on demand.
+        float32 for the original model, uint8 when normalization lives in the graph.
+        """
+        dtype = np.uint8 if self.uint8_input else np.float32
+        buffer = getattr(self._buffers, "array", None)
+        if buffer is None or buffer.shape[0] < batch_size or buffer.dtype != dtype:
+            buffer = np.empty((batch_size, IMAGE_SIZE[1], IMAGE_SIZE[0], 3), dtype=dtype)
+            self._buffers.array = buffer
+        return buffer[:batch_size]
+
+    def _fill_input(self, slot, pixels):
+        """Writes one image into a buffer slot, applying the 1./255 normalization in place."""
+        if self.uint8_input:
+            slot[...] = pixels
+        else:
+            np.divide(pixels, np.float32(255.0), out=slot)
 
     def _preprocess_image(self, image_bytes: bytes):
         """
         Same preprocessing as TF:
         - RGB
         - resize 224x224
-        - normalize 1./255
+        - normalize 1./255 (here or inside the uint8 graph)
         - add batch dimension
+        Returns a view of this thread's reusable buffer.
         """
-        img = Image.open(BytesIO(image_bytes)).convert("RGB")
-        img = img.resize((224, 224))
-        img_array = np.array(img).astype("float32") / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-        return img_array
+        batch = self._input_buffer(1)
+        self._fill_input(batch[0], self._decode_image(image_bytes))
+        return batch
 
     def _get_triage_logic(self, label: str):
         """Same triage rules as your TF code."""
@@ -89,13 +285,56 @@ class DamageAssessmentService:
             "color": "#6b7280"
         })
 
+    def _format_prediction(self, probabilities):
+        """Turns one row of class probabilities into the triage response."""
+        class_idx = int(np.argmax(probabilities))
+        confidence = float(np.max(probabilities))
+        label = self.class_indices.get(str(class_idx)) or self.class_indices.get(class_idx)
+
+        triage = self._get_triage_logic(label)
+
+        return {
+            "status": "success",
+            "detected_event": label,
+            "confidence": confidence,
+            "triage_priority": triage["priority"],
+            "action_recommendation": triage["action"],
+            "ui_color": triage["color"]
+        }
+
+    def _dedupe_lookup(self, pixels):
+        """
+        Returns (hash, cached result or None) for decoded pixels.
+        Hashing failures just bypass the cache.
+        """
+        if self.dedupe is None:
+            return None, None
+        try:
+            value = dhash(pixels)
+        except Exception:
+            return None, None
+        hit = self.dedupe.lookup(value)
+        if hit is None:
+            return value, None
+        result, distance = hit
+        return value, dict(result, dedupe_hit=True, hash_distance=distance)
+
+    def _dedupe_store(self, value, result):
+        if self.dedupe is not None and value is not None:
+            self.dedupe.add(value, dict(result))
+
     def predict_damage(self, image_bytes: bytes):
         if self.session is None:
             return {"error": "Model not loaded"}
 
         try:
             # Preprocess
-            img_array = self._preprocess_image(image_bytes)
+            pixels = self._decode_image(image_bytes)
+            value, cached = self._dedupe_lookup(pixels)
+            if cached is not None:
+                return cached
+            img_array = self._input_buffer(1)
+            self._fill_input(img_array[0], pixels)
 
             # ONNX inference
             preds = self.session.run(
@@ -103,25 +342,191 @@ class DamageAssessmentService:
                 {self.input_name: img_array}
             )[0]
 
-            # Extract prediction
-            class_idx = int(np.argmax(preds))
-            confidence = float(np.max(preds))
-            label = self.class_indices.get(str(class_idx)) or self.class_indices.get(class_idx)
-
-            triage = self._get_triage_logic(label)
-
-            return {
-                "status": "success",
-                "detected_event": label,
-                "confidence": confidence,
-                "triage_priority": triage["priority"],
-                "action_recommendation": triage["action"],
-                "ui_color": triage["color"]
-            }
+            result = self._format_prediction(preds[0])
+            self._dedupe_store(value, result)
+            return result
 
         except Exception as e:
             return {"error": str(e)}
 
+    def _safe_decode(self, image_bytes):
+        """Returns (pixels, error, hash, cached result); cache hits skip inference."""
+        if image_bytes is None:
+            return None, "Image exceeds the maximum allowed size", None, None
+        try:
+            pixels = self._decode_image(image_bytes)
+        except Exception as e:
+            return None, f"Could not decode image: {e}", None, None
+        value, cached = self._dedupe_lookup(pixels)
+        if cached is not None:
+            return None, None, value, cached
+        return pixels, None, value, None
+
+    def predict_damage_batch(self, images: list, batch_size: int = CV_BATCH_SIZE):
+        """
+        Assesses many images at once.
+        `images` is a list of (name, bytes). Images are decoded concurrently,
+        stacked into NHWC batches and run through one session.run per batch.
+        Near-duplicates of already assessed images are answered from the dedupe cache.
+        Returns one result per image in input order; failures are isolated
+        to the image that caused them.
+        """
+        if self.session is None:
+            return [{"filename": name, "error": "Model not loaded"} for name, _ in images]
+
+        batch_size = max(1, batch_size)
+        if self.max_model_batch is not None:
+            batch_size = min(batch_size, self.max_model_batch)
+
+        results = [None] * len(images)
+
+        def submit_window(start):
+            # Decode one batch worth of images on the pool
+            return [
+                (i, self._decode_pool.submit(self._safe_decode, images[i][1]))
+                for i in range(start, min(start + batch_size, len(images)))
+            ]
+
+        # Keep at most two batches decoded at a time: the next one decodes while the current one runs
+        window = submit_window(0)
+        for start in range(0, len(images), batch_size):
+            next_window = submit_window(start + batch_size)
+
+            indices, arrays, hashes = [], [], []
+            for i, future in window:
+                array, error, value, cached = future.result()
+                if cached is not None:
+                    results[i] = cached
+                elif error is not None:
+                    results[i] = {"error": error}
+                else:
+                    indices.append(i)
+                    arrays.append(array)
+                    hashes.append(value)
+
+            if arrays:
+                try:
+                    batch = self._input_buffer(len(arrays))
+                    for slot, pixels in zip(batch, arrays):
+                        self._fill_input(slot, pixels)
+                    preds = self.session.run(None, {self.input_name: batch})[0]
+                    for i, value, row in zip(indices, hashes, preds):
+                        results[i] = self._format_prediction(row)
+                        self._dedupe_store(value, results[i])
+                except Exception as e:
+                    for i in indices:
+                        results[i] = {"error": str(e)}
+
+            window = next_window
+
+        for (name, _), result in zip(images, results):
+            result["filename"] = name
+        return results
+
+    def predict_damage_tiled(self, source, tile_size: int = CV_TILE_SIZE, overlap: float = CV_TILE_OVERLAP,
+                             batch_size: int = CV_BATCH_SIZE):
+        """
+        Sliding-window assessment of a large aerial / UAV image.
+        `source` is image bytes or a seekable file. Overlapping tiles of
+        `tile_size` source pixels are cut lazily, resized to the model input
+        and run through ONNX in batches through the reusable input buffer.
+        Returns per-tile label / confidence grids, a damage heatmap
+        (1 - P(no damage)) and the triage of the most urgent tile.
+        Raises TileLimitError when the image exceeds the decode or tile limits.
+        """
+        if self.session is None:
+            return {"error": "Model not loaded"}
+
+        if isinstance(source, (bytes, bytearray)):
+            source = BytesIO(source)
+        img, scale = open_within_budget(source, CV_TILE_MAX_DECODE_PIXELS)
+
+        try:
+            original_size = (round(img.size[0] / scale), round(img.size[1] / scale))
+            tile = max(1, round(tile_size * scale))
+            stride = max(1, round(tile * (1 - overlap)))
+            xs = tile_positions(img.size[0], tile, stride)
+            ys = tile_positions(img.size[1], tile, stride)
+            if len(xs) * len(ys) > CV_TILE_MAX_TILES:
+                raise TileLimitError(
+                    f"Image would produce {len(xs) * len(ys)} tiles (max {CV_TILE_MAX_TILES}); "
+                    f"use a larger tile_size or less overlap"
+                )
+
+            labels = [[None] * len(xs) for _ in ys]
+            confidence = [[None] * len(xs) for _ in ys]
+            heatmap = [[None] * len(xs) for _ in ys]
+            no_damage = next((int(k) for k, v in self.class_indices.items() if v == NO_DAMAGE_LABEL), None)
+
+            batch_size = max(1, batch_size)
+            if self.max_model_batch is not None:
+                batch_size = min(batch_size, self.max_model_batch)
+            buffer = self._input_buffer(batch_size)
+            pending = []
+            worst = None  # (rank, confidence, row, col, prediction)
+
+            def flush():
+                nonlocal worst
+                if not pending:
+                    return
+                preds = self.session.run(None, {self.input_name: buffer[:len(pending)]})[0]
+                for (row, col), probabilities in zip(pending, preds):
+                    prediction = self._format_prediction(probabilities)
+                    labels[row][col] = prediction["detected_event"]
+                    confidence[row][col] = round(prediction["confidence"], 4)
+                    if no_damage is not None:
+                        heatmap[row][col] = round(1.0 - float(probabilities[no_damage]), 4)
+                    key = (PRIORITY_RANK.get(prediction["triage_priority"], 0), prediction["confidence"])
+                    if worst is None or key > worst[:2]:
+                        worst = key + (row, col, prediction)
+                pending.clear()
+
+            for row, col, pixels in iter_tiles(img, xs, ys, tile, IMAGE_SIZE):
+                self._fill_input(buffer[len(pending)], pixels)
+                pending.append((row, col))
+                if len(pending) == batch_size:
+                    flush()
+            flush()
+        finally:
+            img.close()
+
+        class_counts = {}
+        for label in (label for grid_row in labels for label in grid_row):
+            class_counts[label] = class_counts.get(label, 0) + 1
+
+        _, _, row, col, prediction = worst
+        return {
+            **prediction,
+            "image_size": list(original_size),
+            "decode_scale": round(scale, 4),
+            "tile_size": tile_size,
+            "overlap": overlap,
+            "grid_shape": [len(ys), len(xs)],
+            "tile_origins": {
+                "x": [round(x / scale) for x in xs],
+                "y": [round(y / scale) for y in ys]
+            },
+            "most_severe_tile": {"row": row, "col": col, "x": round(xs[col] / scale), "y": round(ys[row] / scale)},
+            "class_counts": class_counts,
+            "labels": labels,
+            "confidence": confidence,
+            "damage_heatmap": heatmap if no_damage is not None else None
+        }
+
+    def get_stats(self):
+        """Session pool usage (only once the model has been loaded)."""
+        if self._session.state != "ready":
+            return {"state": self._session.state}
+        return {"model": self.model_file, **self.session.stats()}
+
+    def get_dedupe_stats(self):
+        if self.dedupe is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.dedupe.stats()}
+
 
 # Singleton
 cv_service = DamageAssessmentService()
+
+# All CV work from the API goes through this pool so it never blocks the event loop
+cv_executor = BoundedExecutor(CV_INFERENCE_WORKERS, CV_INFERENCE_QUEUE_SIZE, name="cv-inference")
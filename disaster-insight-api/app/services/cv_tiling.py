@@ -0,0 +1,109 @@
+import math
+import os
+import numpy as np
+from PIL import Image, JpegImagePlugin, TiffImagePlugin
+
+
+class TileLimitError(ValueError):
+    """Raised when an image cannot be tiled within the configured size limits."""
+
+
+def tile_positions(length: int, tile: int, stride: int):
+    """Tile offsets along one axis; the last tile is aligned to the edge so nothing is skipped."""
+    if length <= tile:
+        return [0]
+    positions = list(range(0, length - tile + 1, stride))
+    if positions[-1] != length - tile:
+        positions.append(length - tile)
+    return positions
+
+
+_JPEG_MAGIC = b"\xff\xd8\xff"
+_TIFF_MAGICS = (b"II*\x00", b"MM\x00*")
+
+
+def _open_header(source):
+    """
+    Opens an image lazily (header only). Images above PIL's decompression-bomb
+    limit are opened through the JPEG / TIFF plugin directly, which reads the
+    header without that check; PIL's global limit is never touched, and
+    open_within_budget() enforces its own budget before any pixel is decoded.
+    Other formats above the limit are rejected.
+    """
+    start = None if isinstance(source, (str, os.PathLike)) else source.tell()
+    try:
+        return Image.open(source)
+    except Image.DecompressionBombError as e:
+        error = e
+
+    if start is None:
+        with open(source, "rb") as f:
+            magic = f.read(4)
+    else:
+        source.seek(start)
+        magic = source.read(4)
+        source.seek(start)
+
+    if magic[:3] == _JPEG_MAGIC:
+        return JpegImagePlugin.JpegImageFile(source)
+    if magic in _TIFF_MAGICS:
+        return TiffImagePlugin.TiffImageFile(source)
+    raise TileLimitError(str(error))
+
+
+def open_within_budget(source, max_pixels: int):
+    """
+    Opens an image so that at most `max_pixels` are ever decoded.
+    Returns (image, scale), where scale = decoded width / original width.
+
+    - JPEGs over the budget are decoded at 1/2 .. 1/8 scale by libjpeg itself.
+    - Pyramidal TIFFs (e.g. COGs / orthomosaics with overviews) use the largest
+      overview page that fits.
+    - Anything else over the budget is rejected with TileLimitError.
+    """
+    img = _open_header(source)
+    width, height = img.size
+    if width * height <= max_pixels:
+        return img, 1.0
+
+    if img.format == "JPEG":
+        # draft() picks the strongest reduction that is still >= the requested size,
+        # so asking for half the budget's side length lands within the budget
+        factor = math.sqrt(max_pixels / (width * height)) / 2
+        img.draft(img.mode, (max(1, int(width * factor)), max(1, int(height * factor))))
+        if img.size[0] * img.size[1] <= max_pixels:
+            return img, img.size[0] / width
+
+    elif img.format == "TIFF" and getattr(img, "n_frames", 1) > 1:
+        best = None
+        for frame in range(1, img.n_frames):
+            img.seek(frame)
+            w, h = img.size
+            same_aspect = abs(w / h - width / height) < 0.01
+            if same_aspect and w * h <= max_pixels and (best is None or w * h > best[1]):
+                best = (frame, w * h)
+        if best is not None:
+            img.seek(best[0])
+            return img, img.size[0] / width
+
+    img.close()
+    raise TileLimitError(
+        f"Image is {width}x{height} ({width * height / 1e6:.0f} MP), above the "
+        f"{max_pixels / 1e6:.0f} MP decode budget; send a JPEG or a TIFF with overviews"
+    )
+
+
+def iter_tiles(img, xs, ys, tile: int, output_size):
+    """
+    Yields (row, col, pixels) one tile at a time, row by row. Each tile is a
+    `tile` x `tile` crop resized to `output_size` RGB uint8; only the current
+    crop is materialised besides the decoded source.
+    """
+    width, height = img.size
+    for row, y in enumerate(ys):
+        for col, x in enumerate(xs):
+            box = (x, y, min(x + tile, width), min(y + tile, height))
+            crop = img.crop(box)
+            if crop.mode != "RGB":
+                crop = crop.convert("RGB")
+            yield row, col, np.asarray(crop.resize(output_size))
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when a BoundedExecutor has no free worker or queue slot."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a bounded backlog.
+
+    At most `max_workers` jobs run at once and at most `queue_size` more wait;
+    anything beyond that is rejected immediately with ExecutorBusyError so the
+    API can answer 503 instead of piling up work.
+    """
+
+    def __init__(self, max_workers: int, queue_size: int, name: str = "executor"):
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self.queue_size = max(0, int(queue_size))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_size)
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedules `fn` and returns a concurrent Future, or raises ExecutorBusyError."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise ExecutorBusyError(f"{self.name} is at capacity, try again later")
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+        self._slots.release()
+
+    async def run(self, fn, *args, **kwargs):
+        """Awaitable version of submit() for async endpoints."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = self._in_flight
+            return {
+                "name": self.name,
+                "workers": self.max_workers,
+                "queue_size": self.queue_size,
+                "running": min(in_flight, self.max_workers),
+                "queued": max(0, in_flight - self.max_workers),
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
@@ -0,0 +1,121 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+
+
+def dhash(pixels: np.ndarray) -> int:
+    """
+    64-bit difference hash of already decoded RGB pixels (the model input),
+    so the upload is not decoded a second time.
+    The image is reduced to a 9x8 grayscale thumbnail and each bit records
+    whether a pixel is brighter than its right-hand neighbour.
+    """
+    pixels = list(Image.fromarray(pixels).convert("L").resize((9, 8), Image.BILINEAR).getdata())
+
+    value = 0
+    for row in range(8):
+        offset = row * 9
+        for col in range(8):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+class PerceptualHashCache:
+    """
+    Bounded LRU map from perceptual hash to a stored result, with near-duplicate
+    lookup within `max_distance` bits (Hamming distance).
+
+    Uses multi-index hashing: the 64-bit hash is split into max_distance + 1
+    chunks, and by the pigeonhole principle any hash within the distance matches
+    at least one chunk exactly. Each chunk has its own bucket table, so a lookup
+    only compares against the few entries sharing a chunk instead of scanning
+    every cached hash.
+    """
+
+    def __init__(self, max_size: int = 200_000, max_distance: int = 4):
+        self.max_size = max(1, int(max_size))
+        self.max_distance = max(0, min(int(max_distance), HASH_BITS - 1))
+
+        chunks = self.max_distance + 1
+        bounds = [round(i * HASH_BITS / chunks) for i in range(chunks + 1)]
+        self._chunks = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(bounds, bounds[1:])]
+        self._tables = [dict() for _ in self._chunks]  # chunk value -> set of hashes
+
+        self._entries = OrderedDict()  # hash -> result, in LRU order
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._near_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._candidates_checked = 0
+
+    def _chunk_keys(self, value: int):
+        return [(value >> shift) & mask for shift, mask in self._chunks]
+
+    def lookup(self, value: int):
+        """Returns (result, distance) for the closest cached hash, or None."""
+        with self._lock:
+            result = self._entries.get(value)
+            if result is not None:
+                self._entries.move_to_end(value)
+                self._hits += 1
+                return result, 0
+
+            best, best_distance = None, self.max_distance + 1
+            seen = set()
+            for table, key in zip(self._tables, self._chunk_keys(value)):
+                for candidate in table.get(key, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    distance = (candidate ^ value).bit_count()
+                    if distance < best_distance:
+                        best, best_distance = candidate, distance
+            self._candidates_checked += len(seen)
+
+            if best is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(best)
+            self._hits += 1
+            self._near_hits += 1
+            return self._entries[best], best_distance
+
+    def add(self, value: int, result):
+        with self._lock:
+            if value in self._entries:
+                self._entries[value] = result
+                self._entries.move_to_end(value)
+                return
+            self._entries[value] = result
+            for table, key in zip(self._tables, self._chunk_keys(value)):
+                table.setdefault(key, set()).add(value)
+
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                for table, key in zip(self._tables, self._chunk_keys(evicted)):
+                    bucket = table.get(key)
+                    if bucket is not None:
+                        bucket.discard(evicted)
+                        if not bucket:
+                            del table[key]
+                self._evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "max_distance": self.max_distance,
+                "hits": self._hits,
+                "near_duplicate_hits": self._near_hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "avg_candidates_per_lookup": round(self._candidates_checked / lookups, 2) if lookups else 0.0,
+            }
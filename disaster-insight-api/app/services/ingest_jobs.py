@@ -0,0 +1,150 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+class IngestionBusyError(RuntimeError):
+    """Raised when an ingestion job is started while another one is still running."""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"Ingestion job {job_id} is already running")
+        self.job_id = job_id
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class IngestionJob:
+    """Progress and outcome of one background ingestion run."""
+
+    def __init__(self, trigger: str):
+        self.job_id = uuid.uuid4().hex
+        self.trigger = trigger
+        self.state = "queued"  # queued -> running -> succeeded | failed
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.files_total = None
+        self.files_done = 0
+        self.chunks_embedded = 0
+        self.errors = []
+        self.report = None
+        self._started = None
+        self._elapsed = None
+        self._lock = threading.Lock()
+
+    def update(self, **fields):
+        """Progress callback handed to ingest_documents()."""
+        with self._lock:
+            for name, value in fields.items():
+                if name == "error":
+                    self.errors.append(value)
+                else:
+                    setattr(self, name, value)
+
+    def start(self):
+        with self._lock:
+            self.state = "running"
+            self.started_at = _now()
+            self._started = time.perf_counter()
+
+    def finish(self, report=None, error=None):
+        with self._lock:
+            self._elapsed = time.perf_counter() - self._started
+            self.finished_at = _now()
+            self.report = report
+            if error is not None:
+                self.errors.append({"error": error})
+                self.state = "failed"
+            else:
+                self.state = "succeeded"
+
+    def status(self) -> dict:
+        with self._lock:
+            if self._elapsed is not None:
+                elapsed = self._elapsed
+            elif self._started is not None:
+                elapsed = time.perf_counter() - self._started
+            else:
+                elapsed = 0.0
+            return {
+                "job_id": self.job_id,
+                "trigger": self.trigger,
+                "state": self.state,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "elapsed_seconds": round(elapsed, 3),
+                "files_total": self.files_total,
+                "files_done": self.files_done,
+                "chunks_embedded": self.chunks_embedded,
+                "throughput": {
+                    "files_per_s": round(self.files_done / elapsed, 2) if elapsed else 0.0,
+                    "chunks_per_s": round(self.chunks_embedded / elapsed, 2) if elapsed else 0.0
+                },
+                "errors": list(self.errors),
+                "report": self.report
+            }
+
+
+class IngestionJobManager:
+    """
+    Runs ingestion in the background on a single worker thread.
+    At most one job runs at a time; starting another raises IngestionBusyError.
+    Queries keep using the collection while a job writes to it.
+    """
+
+    def __init__(self, ingest_fn, history: int = 20):
+        self._ingest = ingest_fn
+        self._history = max(1, history)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-ingest")
+        self._jobs = OrderedDict()  # job_id -> IngestionJob, oldest first
+        self._current = None
+        self._lock = threading.Lock()
+
+    def start(self, trigger: str = "api") -> IngestionJob:
+        with self._lock:
+            if self._current is not None:
+                raise IngestionBusyError(self._current.job_id)
+            job = IngestionJob(trigger)
+            self._current = job
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self._history:
+                self._jobs.popitem(last=False)
+            try:
+                self._executor.submit(self._run, job)
+            except Exception:
+                # e.g. after shutdown(): do not leave a job that blocks every later start
+                self._current = None
+                self._jobs.pop(job.job_id, None)
+                raise
+        return job
+
+    def _run(self, job: IngestionJob):
+        job.start()
+        try:
+            job.finish(report=self._ingest(progress=job.update))
+        except Exception as e:
+            print(f"❌ Ingestion job {job.job_id} failed: {e}")
+            job.finish(error=str(e))
+        finally:
+            with self._lock:
+                self._current = None
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.status() if job is not None else None
+
+    def list(self) -> list:
+        """Recent jobs, newest first."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.status() for job in reversed(jobs)]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,93 @@
+import re
+import time
+
+# Backends behind the chat agent. Each one creates per-conversation chat
+# sessions and runs one user turn (including any tool calls) synchronously;
+# agent_service runs turns on a worker thread so the event loop never waits.
+
+
+class GeminiBackend:
+    """Google Gemini with automatic function calling (google-generativeai)."""
+
+    name = "gemini"
+
+    def __init__(self, tools, model_name: str, api_key: str = None):
+        import google.generativeai as genai
+
+        if not api_key:
+            print("🚨 AGENT ERROR: GOOGLE_API_KEY not found in environment.")
+        else:
+            # Configure the SDK
+            genai.configure(api_key=api_key)
+
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name=model_name, tools=tools)
+
+    def start_chat(self):
+        return self.model.start_chat(enable_automatic_function_calling=True)
+
+    def send_message(self, session, prompt: str, timeout: float = None) -> str:
+        # The timeout applies to each HTTP request, so a hung call releases its worker
+        request_options = {"timeout": timeout} if timeout else None
+        return session.send_message(prompt, request_options=request_options).text
+
+
+class _FakeChatSession:
+    def __init__(self):
+        self.history = []  # [{"role", "text"}]; sized by estimate_history_bytes()
+
+
+class FakeLLMBackend:
+    """
+    Deterministic local stand-in for Gemini, for offline load tests.
+
+    Every turn routes the user's message to one tool by keyword (forecast,
+    risk, safety question, otherwise message classification), calls it with
+    arguments parsed from the message, and answers with the tool output.
+    `latency_seconds` is slept before and after the tool call to mimic the
+    two model round trips of automatic function calling. Same input, same
+    tool call, same answer.
+    """
+
+    name = "fake"
+
+    DISASTER_TYPES = ("Earthquake", "Flood", "Storm", "Drought", "Wildfire", "Landslide", "Volcanic activity")
+    QUESTION_WORDS = ("how", "what", "safety", "protocol", "kit", "prepare", "should")
+
+    def __init__(self, tools, latency_seconds: float = 0.0):
+        self.tools = {tool.__name__: tool for tool in tools}
+        self.latency_seconds = max(0.0, latency_seconds)
+
+    def start_chat(self):
+        return _FakeChatSession()
+
+    def plan_tool_call(self, message: str):
+        """Returns (tool_name, kwargs) for a user message."""
+        lower = message.lower()
+        if "forecast" in lower:
+            return "get_global_earthquake_forecast", {}
+        if "risk" in lower:
+            disaster_type = next((d for d in self.DISASTER_TYPES if d.lower() in lower), "Flood")
+            match = re.search(r"\b(?:in|for)\s+([A-Za-z][A-Za-z ]*?)(?:[?.!,]|$)", message)
+            region = match.group(1).strip().title() if match else "Pakistan"
+            return "get_disaster_risk_assessment", {"region": region, "disaster_type": disaster_type}
+        if "?" in message or any(word in lower.split() for word in self.QUESTION_WORDS):
+            return "search_safety_protocols", {"query": message}
+        return "analyze_emergency_message", {"message": message}
+
+    def send_message(self, session, prompt: str, timeout: float = None) -> str:
+        # agent_service prepends the system instruction; only the user's text drives routing
+        message = prompt.rsplit("User: ", 1)[-1].strip()
+        session.history.append({"role": "user", "text": prompt})
+
+        time.sleep(self.latency_seconds)
+        tool_name, kwargs = self.plan_tool_call(message)
+        tool = self.tools.get(tool_name)
+        tool_output = tool(**kwargs) if tool is not None else f"Tool {tool_name} is not available."
+        session.history.append({"role": "model", "function_call": tool_name, "args": kwargs})
+        session.history.append({"role": "function", "name": tool_name, "text": str(tool_output)})
+
+        time.sleep(self.latency_seconds)
+        text = f"[{tool_name}] {tool_output}"
+        session.history.append({"role": "model", "text": text})
+        return text
@@ -0,0 +1,139 @@
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LazyModel:
+    """
+    Loads a model (or any heavy resource) on first access and remembers
+    its load state and timing. Safe to call from many threads at once.
+    """
+
+    def __init__(self, name: str, loader, required: bool = True):
+        self.name = name
+        self.required = required  # optional accelerators (tables, indexes) have a fallback
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._value = None
+        self.state = "pending"  # pending -> loading -> ready | failed
+        self.error = None
+        self.load_seconds = None
+
+    def get(self):
+        """Returns the loaded resource, or None if loading failed."""
+        if self.state in ("ready", "failed"):
+            return self._value
+        with self._lock:
+            if self.state in ("ready", "failed"):
+                return self._value
+
+            self.state = "loading"
+            start = time.perf_counter()
+            try:
+                self._value = self._loader()
+                if self._value is None:
+                    self.error = "loader returned no model"
+                    self.state = "failed"
+                else:
+                    self.state = "ready"
+            except Exception as e:
+                print(f"❌ Failed to load {self.name}: {e}")
+                traceback.print_exc()
+                self._value = None
+                self.error = str(e)
+                self.state = "failed"
+            self.load_seconds = round(time.perf_counter() - start, 3)
+        return self._value
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "required": self.required,
+            "load_seconds": self.load_seconds,
+            "error": self.error
+        }
+
+
+class ModelRegistry:
+    """Tracks every lazily loaded model so they can be warmed up and reported on."""
+
+    def __init__(self):
+        self._models = {}
+        self._warmup_started_at = None
+        self._warmup_seconds = None
+        self._executor = None
+
+    def register(self, name: str, loader, required: bool = True) -> LazyModel:
+        model = LazyModel(name, loader, required=required)
+        self._models[name] = model
+        return model
+
+    def warm_up(self, max_workers: int = 4, extra_tasks=()):
+        """
+        Loads all registered models in parallel on a background pool and returns
+        immediately. `extra_tasks` are callables run on the same pool afterwards
+        (e.g. populating the knowledge base once its collection is loaded).
+        """
+        if self._executor is not None:
+            return
+        self._warmup_started_at = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="model-warmup")
+        futures = [self._executor.submit(model.get) for model in self._models.values()]
+
+        def _record_done(_):
+            if all(f.done() for f in futures) and self._warmup_seconds is None:
+                self._warmup_seconds = round(time.perf_counter() - self._warmup_started_at, 3)
+                print(f"✅ Model warm-up finished in {self._warmup_seconds}s")
+
+        for future in futures:
+            future.add_done_callback(_record_done)
+
+        for task in extra_tasks:
+            self._executor.submit(self._run_task, task)
+
+    @staticmethod
+    def _run_task(task):
+        try:
+            task()
+        except Exception as e:
+            print(f"⚠️ Warm-up task {getattr(task, '__name__', task)} failed: {e}")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def status(self) -> dict:
+        """
+        Overall state is "loading" while a warm-up is still in progress,
+        "degraded" if any model failed, "ready" when everything is loaded and
+        "lazy" when models are left to load on first use.
+        `ready` is False while loading and when a required model failed, so
+        traffic is not routed to an instance missing e.g. its classifier; a
+        failed optional model (served by a fallback) only marks it degraded.
+        """
+        models = {name: model.status() for name, model in self._models.items()}
+        states = [m["state"] for m in models.values()]
+        warming = self._executor is not None
+        required_failed = [name for name, m in models.items() if m["required"] and m["state"] == "failed"]
+
+        if "loading" in states or (warming and "pending" in states):
+            overall = "loading"
+        elif "failed" in states:
+            overall = "degraded"
+        elif all(state == "ready" for state in states):
+            overall = "ready"
+        else:
+            overall = "lazy"
+
+        return {
+            "status": overall,
+            "ready": overall != "loading" and not required_failed,
+            "failed_required": required_failed,
+            "warmup_seconds": self._warmup_seconds,
+            "models": models
+        }
+
+
+# Shared registry for every service in the API
+model_registry = ModelRegistry()
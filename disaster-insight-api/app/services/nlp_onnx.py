@@ -0,0 +1,122 @@
+import numpy as np
+import onnxruntime as ort
+from pathlib import Path
+from transformers import AutoConfig, AutoTokenizer
+
+
+def quantize_nlp_onnx(onnx_path, quantized_path):
+    """Writes a dynamically int8-quantized copy of an exported ONNX classifier."""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    print(f"Quantizing NLP classifier to int8: {quantized_path}")
+    quantize_dynamic(str(onnx_path), str(quantized_path), weight_type=QuantType.QInt8)
+    print("✅ int8 quantization complete")
+
+
+def export_nlp_onnx(model_dir, onnx_path, quantized_path=None, opset: int = 14):
+    """
+    Exports the fine-tuned DistilBERT classifier to ONNX and, if `quantized_path`
+    is given, also writes a dynamically int8-quantized copy.
+    PyTorch is only needed here, not at inference time.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    model_dir = str(model_dir)
+    onnx_path = Path(onnx_path)
+    print(f"Exporting NLP classifier to ONNX: {onnx_path}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+
+    dummy = tokenizer(["export sample text", "a second, longer export sample text"], padding=True, return_tensors="pt")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            str(onnx_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+        )
+    print("✅ ONNX export complete")
+
+    if quantized_path is not None:
+        quantize_nlp_onnx(onnx_path, quantized_path)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    # Same formulation as the transformers text-classification pipeline
+    maxes = np.max(logits, axis=-1, keepdims=True)
+    shifted_exp = np.exp(logits - maxes)
+    return shifted_exp / shifted_exp.sum(axis=-1, keepdims=True)
+
+
+class OnnxTextClassifier:
+    """
+    Drop-in replacement for the transformers `text-classification` pipeline,
+    backed by onnxruntime. Returns the same [{"label", "score"}] structure.
+    """
+
+    def __init__(self, model_dir, onnx_path, providers=None):
+        model_dir = str(model_dir)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.id2label = AutoConfig.from_pretrained(model_dir).id2label
+        self.max_length = min(self.tokenizer.model_max_length, 512)
+        self.session = ort.InferenceSession(
+            str(onnx_path),
+            providers=providers or ["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _run(self, texts, truncation: bool):
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=truncation,
+            max_length=self.max_length if truncation else None,
+            return_tensors="np",
+        )
+        feed = {
+            name: encoded[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask")
+            if name in self.input_names
+        }
+        logits = self.session.run(None, feed)[0].astype(np.float32)
+        scores = _softmax(logits)
+        best = scores.argmax(axis=-1)
+        return [
+            {"label": self.id2label[int(idx)], "score": float(row[idx])}
+            for idx, row in zip(best, scores)
+        ]
+
+    def __call__(self, inputs, batch_size: int = None, truncation: bool = False, **kwargs):
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        batch_size = batch_size or 1
+        results = []
+        for start in range(0, len(texts), batch_size):
+            results.extend(self._run(texts[start:start + batch_size], truncation))
+        return results
+
+
+def compare_classifiers(reference, candidate, texts, batch_size: int = 16):
+    """
+    Parity check between two classifiers exposing the pipeline call contract.
+    Returns label agreement and the largest absolute score difference.
+    """
+    ref = reference(list(texts), batch_size=batch_size, truncation=True)
+    cand = candidate(list(texts), batch_size=batch_size, truncation=True)
+    matches = sum(r["label"] == c["label"] for r, c in zip(ref, cand))
+    score_diffs = [abs(r["score"] - c["score"]) for r, c in zip(ref, cand)]
+    return {
+        "samples": len(ref),
+        "label_agreement": matches / len(ref) if ref else 1.0,
+        "max_score_diff": max(score_diffs) if score_diffs else 0.0,
+        "mean_score_diff": sum(score_diffs) / len(score_diffs) if score_diffs else 0.0,
+    }
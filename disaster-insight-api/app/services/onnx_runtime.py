@@ -0,0 +1,100 @@
+import os
+import queue
+import threading
+
+import onnxruntime as ort
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disabled": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+
+def build_session_options(intra_op_threads: int = 0, inter_op_threads: int = 0,
+                          graph_optimization: str = "all", execution_mode: str = "sequential",
+                          enable_cpu_mem_arena: bool = True, enable_mem_pattern: bool = True):
+    """SessionOptions from plain config values; 0 threads means onnxruntime's default."""
+    if graph_optimization not in GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(f"graph_optimization must be one of {sorted(GRAPH_OPTIMIZATION_LEVELS)}")
+    if execution_mode not in EXECUTION_MODES:
+        raise ValueError(f"execution_mode must be one of {sorted(EXECUTION_MODES)}")
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = max(0, intra_op_threads)
+    options.inter_op_num_threads = max(0, inter_op_threads)
+    options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[graph_optimization]
+    options.execution_mode = EXECUTION_MODES[execution_mode]
+    options.enable_cpu_mem_arena = enable_cpu_mem_arena
+    options.enable_mem_pattern = enable_mem_pattern
+    return options
+
+
+def default_intra_op_threads(pool_size: int) -> int:
+    """Splits the machine's cores across the pool so sessions don't oversubscribe."""
+    if pool_size <= 1:
+        return 0
+    return max(1, (os.cpu_count() or 1) // pool_size)
+
+
+class SessionPool:
+    """
+    A fixed set of InferenceSessions over the same model.
+
+    Each run() checks out a free session, so up to `size` inferences execute in
+    parallel. Exposes the subset of the InferenceSession API the services use
+    (run, get_inputs, get_outputs).
+    """
+
+    def __init__(self, model_path, size: int = 1, sess_options=None, providers=None):
+        self.size = max(1, int(size))
+        self._sessions = [
+            ort.InferenceSession(
+                str(model_path),
+                sess_options=sess_options,
+                providers=providers or ["CPUExecutionProvider"]
+            )
+            for _ in range(self.size)
+        ]
+        self._available = queue.Queue()
+        for session in self._sessions:
+            self._available.put(session)
+
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._waits = 0
+
+    def run(self, output_names, input_feed, run_options=None):
+        try:
+            session = self._available.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self._waits += 1
+            session = self._available.get()
+        try:
+            return session.run(output_names, input_feed, run_options)
+        finally:
+            self._available.put(session)
+            with self._lock:
+                self._runs += 1
+
+    def get_inputs(self):
+        return self._sessions[0].get_inputs()
+
+    def get_outputs(self):
+        return self._sessions[0].get_outputs()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": self.size,
+                "idle": self._available.qsize(),
+                "runs": self._runs,
+                "runs_that_waited": self._waits,
+            }
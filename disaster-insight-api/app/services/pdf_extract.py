@@ -0,0 +1,25 @@
+from pypdf import PdfReader
+
+# Kept free of chromadb / torch imports: this module is what ingestion worker processes load
+
+CHUNK_SIZE = 1000
+MIN_CHUNK_LENGTH = 50
+
+
+def extract_chunks(file_path, filename, chunk_size: int = CHUNK_SIZE, min_length: int = MIN_CHUNK_LENGTH):
+    """
+    Returns (ids, documents, metadatas) for one PDF.
+    Pages are joined once instead of growing a string page by page; chunk
+    boundaries and IDs (filename + character offset) are unchanged.
+    """
+    reader = PdfReader(file_path)
+    text = "".join([(page.extract_text() or "") + "\n" for page in reader.pages])
+
+    ids, documents, metadatas = [], [], []
+    for i in range(0, len(text), chunk_size):
+        chunk = text[i:i + chunk_size]
+        if len(chunk) > min_length:
+            ids.append(f"{filename}_{i}")
+            documents.append(chunk)
+            metadatas.append({"source": filename})
+    return ids, documents, metadatas
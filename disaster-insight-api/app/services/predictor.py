@@ -2,7 +2,11 @@ import pandas as pd
 import numpy as np
 import joblib
 import json
+import re
+import hashlib
+import threading
 import traceback
+from datetime import datetime
 from functools import lru_cache
 from prophet import Prophet
 from prophet.serialize import model_from_json
@@ -12,35 +16,221 @@ from pathlib import Path
 # ... (imports from config are the same)
 from app.core.config import (
     NLP_MODEL_PATH,
+    NLP_ONNX_PATH,
+    NLP_ONNX_INT8_PATH,
+    NLP_BACKEND,
     RISK_PIPELINE_PATH,
+    RISK_TABLE_PATH,
     GLOBAL_FORECAST_MODEL_PATH,
     GLOBAL_FORECAST_DATA_PATH,
-    REGIONAL_FORECAST_MODEL_PATH
+    REGIONAL_FORECAST_MODEL_PATH,
+    NLP_BATCHING_ENABLED,
+    NLP_BATCH_MAX_SIZE,
+    NLP_BATCH_MAX_WAIT_MS,
+    NLP_CACHE_ENABLED,
+    NLP_CACHE_MAX_SIZE,
+    NLP_CACHE_TTL_SECONDS,
+    RISK_FAST_PATH_ENABLED,
+    RISK_TABLE_ENABLED,
+    RISK_TABLE_CONTEXT,
+    PROPHET_CACHE_MAX_SIZE,
+    PROPHET_CACHE_TTL_SECONDS
 )
+from app.services.batching import MicroBatcher
+from app.services.cache import LRUCache
+from app.services.model_registry import model_registry, LazyModel
+from app.services.risk_features import RiskFeatureEncoder
+from app.services.risk_table import RiskLookupTable, build_risk_table, model_fingerprint
+
+_URL_RE = re.compile(r"(https?://\S+|www\.\S+)", re.IGNORECASE)
+_RT_PREFIX_RE = re.compile(r"^(rt\s+@\w+:?\s*)+", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def tweet_cache_key(text: str) -> str:
+    """
+    Content hash of a tweet after normalization, so retweets and copy-pasted
+    messages share one cache entry: URLs and leading "RT @user:" prefixes are
+    stripped, case is folded and whitespace is collapsed.
+    """
+    normalized = _URL_RE.sub(" ", text)
+    normalized = _WHITESPACE_RE.sub(" ", normalized).strip()
+    normalized = _RT_PREFIX_RE.sub("", normalized).lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+# Feature columns of the regional impact model, in training order (notebook 04)
+REGIONAL_FEATURES = ['event_count', 'max_magnitude', 'avg_magnitude']
 
 class PredictionService:
     # ... (__init__ and all loading methods are the same)
     def __init__(self):
-        self.nlp_classifier = self._load_nlp_classifier()
-        self.risk_pipeline = self._load_risk_pipeline()
-        self.global_forecaster = self._load_global_forecaster()
-        self.global_forecast_data = self._load_global_forecast_data()
-        self.historical_earthquake_data = self._load_historical_earthquake_data() # Added for context
-        self.regional_forecaster = self._load_regional_forecaster()
+        # Models load lazily on first use (or in parallel via model_registry.warm_up()),
+        # so importing this module no longer blocks on every model.
+        self._nlp_classifier = model_registry.register("nlp_classifier", self._load_nlp_classifier)
+        self._risk_pipeline = model_registry.register("risk_pipeline", self._load_risk_pipeline)
+        self._global_forecaster = model_registry.register("global_forecaster", self._load_global_forecaster)
+        self._global_forecast_data = model_registry.register("global_forecast_data", self._load_global_forecast_data)
+        self._historical_earthquake_data = model_registry.register("historical_earthquake_data", self._load_historical_earthquake_data)
+        self._regional_forecaster = model_registry.register("regional_forecaster", self._load_regional_forecaster)
+
+        # Serialized forecast responses per `periods`, with their ETags
+        self._forecast_payloads = model_registry.register("global_forecast_payloads", self._build_forecast_payloads)
+        self._forecast_payloads_lock = threading.Lock()
+
+        # On-demand Prophet forecasts share one model, so runs are serialized and memoized
+        self._prophet_lock = threading.Lock()
+        self.prophet_cache = LRUCache(
+            maxsize=PROPHET_CACHE_MAX_SIZE,
+            ttl_seconds=PROPHET_CACHE_TTL_SECONDS,
+            name="prophet-forecasts"
+        )
+
+        # Optional DataFrame-free encoder for the risk pipeline (built on first risk request)
+        self._risk_encoder = LazyModel("risk_fast_path", self._load_risk_encoder) if RISK_FAST_PATH_ENABLED else None
+
+        # Optional precomputed risk table, answered in O(1) before any live inference
+        self._risk_table = None
+        self._risk_table_build_started = False
+        if RISK_TABLE_ENABLED:
+            self._risk_table = model_registry.register("risk_lookup_table", self._load_risk_table, required=False)
+
+        # Repeated / retweeted texts are answered from a content-addressed cache
+        self.tweet_cache = None
+        if NLP_CACHE_ENABLED:
+            self.tweet_cache = LRUCache(
+                maxsize=NLP_CACHE_MAX_SIZE,
+                ttl_seconds=NLP_CACHE_TTL_SECONDS,
+                name="nlp-results"
+            )
+
+        # Concurrent single-text requests are grouped into one padded forward pass
+        self.tweet_batcher = None
+        if NLP_BATCHING_ENABLED:
+            self.tweet_batcher = MicroBatcher(
+                self._classify_texts,
+                max_batch_size=NLP_BATCH_MAX_SIZE,
+                max_wait_ms=NLP_BATCH_MAX_WAIT_MS,
+                name="nlp-classifier"
+            )
+
+    # --- Lazily loaded models ---
+    @property
+    def nlp_classifier(self):
+        return self._nlp_classifier.get()
+
+    @property
+    def risk_pipeline(self):
+        return self._risk_pipeline.get()
+
+    @property
+    def global_forecaster(self):
+        return self._global_forecaster.get()
+
+    @property
+    def global_forecast_data(self):
+        return self._global_forecast_data.get()
+
+    @property
+    def historical_earthquake_data(self):
+        return self._historical_earthquake_data.get()
+
+    @property
+    def regional_forecaster(self):
+        return self._regional_forecaster.get()
 
     @lru_cache(maxsize=1)
     def _load_nlp_classifier(self):
+        if NLP_BACKEND in ("onnx", "onnx-int8"):
+            return self._load_onnx_nlp_classifier(quantized=NLP_BACKEND == "onnx-int8")
+
         print("Loading NLP classification model...")
         model_path_str = str(NLP_MODEL_PATH)
         tokenizer = AutoTokenizer.from_pretrained(model_path_str)
         model = AutoModelForSequenceClassification.from_pretrained(model_path_str)
         return pipeline("text-classification", model=model, tokenizer=tokenizer)
 
+    def _load_onnx_nlp_classifier(self, quantized: bool):
+        from app.services.nlp_onnx import OnnxTextClassifier, export_nlp_onnx, quantize_nlp_onnx
+
+        # First run on this node: build the ONNX graph(s) from the PyTorch weights
+        if not NLP_ONNX_PATH.exists():
+            print(f"⚠️ {NLP_ONNX_PATH.name} not found, exporting it now...")
+            export_nlp_onnx(NLP_MODEL_PATH, NLP_ONNX_PATH)
+        if quantized and not NLP_ONNX_INT8_PATH.exists():
+            quantize_nlp_onnx(NLP_ONNX_PATH, NLP_ONNX_INT8_PATH)
+
+        onnx_path = NLP_ONNX_INT8_PATH if quantized else NLP_ONNX_PATH
+        print(f"Loading NLP classification model (ONNX Runtime, {onnx_path.name})...")
+        return OnnxTextClassifier(NLP_MODEL_PATH, onnx_path)
+
     @lru_cache(maxsize=1)
     def _load_risk_pipeline(self):
         print("Loading static risk prediction pipeline...")
         return joblib.load(str(RISK_PIPELINE_PATH))
 
+    def _load_risk_encoder(self):
+        """
+        Builds the NumPy fast path for the risk pipeline and verifies it reproduces
+        the pipeline's probabilities exactly; returns None to fall back to pandas.
+        """
+        pipeline = self.risk_pipeline
+        if pipeline is None:
+            return None
+        try:
+            encoder = RiskFeatureEncoder(pipeline)
+            probe = encoder.probe_records()
+            expected = pipeline.predict_proba(pd.DataFrame(probe))[:, 1]
+            if not np.array_equal(encoder.predict_proba(probe), expected):
+                print("⚠️ Risk fast path disabled: probabilities differ from the pipeline")
+                return None
+        except Exception as e:
+            print(f"⚠️ Risk fast path disabled: {e}")
+            return None
+        print("✅ Risk fast path enabled")
+        return encoder
+
+    def _load_risk_table(self):
+        """Loads the saved risk table, rebuilding it if the model or year changed."""
+        pipeline = self.risk_pipeline
+        if pipeline is None:
+            return None
+        year = datetime.now().year
+        fingerprint = model_fingerprint(RISK_PIPELINE_PATH)
+
+        if RISK_TABLE_PATH.exists():
+            try:
+                table = RiskLookupTable.load(RISK_TABLE_PATH)
+                if table.is_fresh(fingerprint, year, RISK_TABLE_CONTEXT):
+                    print(f"✅ Risk lookup table loaded ({table.probabilities.size:,} cells)")
+                    return table
+                print("⚠️ Risk lookup table is stale, rebuilding...")
+            except Exception as e:
+                print(f"⚠️ Could not read risk lookup table ({e}), rebuilding...")
+
+        table = build_risk_table(pipeline, year, fingerprint, RISK_TABLE_CONTEXT)
+        try:
+            table.save(RISK_TABLE_PATH)
+        except OSError as e:
+            print(f"⚠️ Could not save risk lookup table: {e}")
+        return table
+
+    def _ready_risk_table(self):
+        """
+        The lookup table once it is loaded, else None. A request never waits for
+        the table: the first one starts loading / building it in the background
+        (unless warm-up already did) and is answered by live inference meanwhile.
+        """
+        lazy = self._risk_table
+        if lazy is None:
+            return None
+        if lazy.state == "ready":
+            return lazy.get()
+        if lazy.state == "pending" and not self._risk_table_build_started:
+            self._risk_table_build_started = True
+            threading.Thread(target=lazy.get, name="risk-table-build", daemon=True).start()
+        return None
+
     @lru_cache(maxsize=1)
     def _load_global_forecaster(self):
         print("Loading Prophet global forecasting model...")
@@ -76,14 +266,116 @@ class PredictionService:
     # --- Prediction methods ---
     def predict_tweet_classification(self, text: str):
         if self.nlp_classifier is None: return {"error": "Model not loaded"}
-        result = self.nlp_classifier(text)
-        return result[0]
+        key = tweet_cache_key(text) if self.tweet_cache is not None else None
+        if key is not None:
+            cached = self.tweet_cache.get(key)
+            if cached is not None:
+                return dict(cached)
+
+        if self.tweet_batcher is not None:
+            result = self.tweet_batcher(text)
+        else:
+            result = self.nlp_classifier(text)[0]
+
+        if key is not None:
+            self.tweet_cache.set(key, dict(result))
+        return result
+
+    def predict_tweet_classification_batch(self, texts: list):
+        """
+        Classifies several texts in one padded forward pass.
+        Returns one {"label", "score"} dict per input, in input order.
+        """
+        if self.nlp_classifier is None:
+            raise RuntimeError("Model not loaded")
+        texts = list(texts)
+        if self.tweet_cache is None:
+            return self._classify_texts(texts)
+
+        keys = [tweet_cache_key(t) for t in texts]
+        results = [self.tweet_cache.get(k) for k in keys]
+        misses = [i for i, r in enumerate(results) if r is None]
+        if misses:
+            fresh = self._classify_texts([texts[i] for i in misses])
+            for i, result in zip(misses, fresh):
+                self.tweet_cache.set(keys[i], dict(result))
+                results[i] = result
+        return [dict(r) for r in results]
+
+    def _classify_texts(self, texts: list):
+        """Runs the NLP model on a list of texts, bypassing the cache."""
+        if not texts:
+            return []
+        # truncation keeps one over-long text from failing the whole batch
+        return self.nlp_classifier(texts, batch_size=len(texts), truncation=True)
+
+    def get_nlp_stats(self):
+        """Batching and result-cache statistics for the tweet classifier."""
+        return {
+            "batching_enabled": self.tweet_batcher is not None,
+            "batcher": self.tweet_batcher.stats() if self.tweet_batcher is not None else None,
+            "cache_enabled": self.tweet_cache is not None,
+            "cache": self.tweet_cache.stats() if self.tweet_cache is not None else None
+        }
 
     def predict_static_risk(self, data: pd.DataFrame):
         if self.risk_pipeline is None: return {"error": "Model not loaded"}
         prediction_proba = self.risk_pipeline.predict_proba(data)[:, 1]
         return {"high_risk_probability": float(prediction_proba[0])}
 
+    def predict_static_risk_record(self, record: dict):
+        """
+        Scores a single record (keyed by training column names) from the lookup
+        table when possible, otherwise without building a DataFrame when the
+        fast path is available.
+        """
+        if self.risk_pipeline is None: return {"error": "Model not loaded"}
+        table = self._ready_risk_table()
+        if table is not None:
+            probability = table.lookup(record)
+            if probability is not None:
+                return {"high_risk_probability": probability}
+
+        encoder = self._risk_encoder.get() if self._risk_encoder is not None else None
+        if encoder is None:
+            return self.predict_static_risk(pd.DataFrame([record]))
+        return {"high_risk_probability": float(encoder.predict_proba([record])[0])}
+
+    def predict_static_risk_batch(self, records: list):
+        """Scores many records; table misses go through one vectorized predict_proba call."""
+        if self.risk_pipeline is None:
+            raise RuntimeError("Model not loaded")
+        if not records:
+            return []
+
+        probabilities = [None] * len(records)
+        table = self._ready_risk_table()
+        if table is not None:
+            probabilities = [table.lookup(r) for r in records]
+        misses = [i for i, p in enumerate(probabilities) if p is None]
+
+        if misses:
+            live_records = [records[i] for i in misses]
+            encoder = self._risk_encoder.get() if self._risk_encoder is not None else None
+            if encoder is not None:
+                prediction_proba = encoder.predict_proba(live_records)
+            else:
+                prediction_proba = self.risk_pipeline.predict_proba(pd.DataFrame(live_records))[:, 1]
+            for i, p in zip(misses, prediction_proba):
+                probabilities[i] = float(p)
+
+        return [{"high_risk_probability": p} for p in probabilities]
+
+    def get_risk_stats(self):
+        """Lookup-table usage for the risk model."""
+        lazy = self._risk_table
+        table = lazy.get() if lazy is not None and lazy.state == "ready" else None
+        return {
+            "table_enabled": lazy is not None,
+            "table_state": lazy.state if lazy is not None else None,
+            "table": table.stats() if table is not None else None
+        }
+
     # --- CORRECTED METHOD ---
     def get_global_forecast(self, periods: int = 60):
         """
@@ -112,10 +404,91 @@ class PredictionService:
         return future_forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].to_dict(orient='records')
 
 
+    def _serialize_forecast(self, periods: int):
+        forecast = self.get_global_forecast(periods=periods)
+        if isinstance(forecast, dict) and "error" in forecast:
+            raise RuntimeError(forecast["error"])
+        body = json.dumps({"forecast": forecast}, separators=(",", ":")).encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return body, etag
+
+    def _build_forecast_payloads(self):
+        """Pre-serializes the forecast for the periods the API and the agent use."""
+        return {periods: self._serialize_forecast(periods) for periods in (60, 30)}
+
+    def get_global_forecast_json(self, periods: int = 60):
+        """
+        Returns (json_bytes, etag) for the forecast. The CSV never changes between
+        deploys, so each `periods` value is serialized once and reused.
+        """
+        payloads = self._forecast_payloads.get()
+        if payloads is None:
+            raise RuntimeError("Forecast data not loaded")
+        payload = payloads.get(periods)
+        if payload is None:
+            payload = self._serialize_forecast(periods)
+            with self._forecast_payloads_lock:
+                payloads[periods] = payload
+        return payload
+
+    def forecast_global_earthquakes(self, horizon: int = 60, freq: str = "M", uncertainty_samples: int = 1000):
+        """
+        Computes a fresh forecast from the loaded Prophet model for an arbitrary
+        horizon / frequency. Results are memoized per parameter set.
+        """
+        key = (horizon, freq, uncertainty_samples)
+        cached = self.prophet_cache.get(key)
+        if cached is not None:
+            return cached
+
+        model = self.global_forecaster
+        if model is None:
+            return {"error": "Prophet model not loaded"}
+
+        with self._prophet_lock:
+            previous_samples = model.uncertainty_samples
+            model.uncertainty_samples = uncertainty_samples
+            try:
+                future = model.make_future_dataframe(periods=horizon, freq=freq, include_history=False)
+                # The saved model's history is UTC-aware (see notebook 03); Prophet only predicts on naive dates
+                if future['ds'].dt.tz is not None:
+                    future['ds'] = future['ds'].dt.tz_localize(None)
+                forecast = model.predict(future)
+            finally:
+                model.uncertainty_samples = previous_samples
+
+        # Without uncertainty sampling Prophet omits the interval columns
+        for column in ('yhat_lower', 'yhat_upper'):
+            if column not in forecast:
+                forecast[column] = forecast['yhat']
+
+        forecast['ds'] = forecast['ds'].dt.strftime('%Y-%m-%d')
+        records = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].to_dict(orient='records')
+        self.prophet_cache.set(key, records)
+        return records
+
     def predict_regional_impact(self, data: pd.DataFrame):
         if self.regional_forecaster is None: return {"error": "Model not loaded"}
         prediction_proba = self.regional_forecaster.predict_proba(data)[:, 1]
         return {"high_impact_probability": float(prediction_proba[0])}
 
+    def predict_regional_impact_batch(self, rows: list):
+        """
+        Scores many region-quarter rows in a single predict_proba call.
+        Returns one probability per row, in input order.
+        """
+        if self.regional_forecaster is None:
+            raise RuntimeError("Model not loaded")
+        if not rows:
+            return []
+        # Column-wise construction avoids pandas' per-row dict handling
+        data = pd.DataFrame({
+            feature: np.fromiter((row[feature] for row in rows), dtype=np.float64, count=len(rows))
+            for feature in REGIONAL_FEATURES
+        })
+        data['event_count'] = data['event_count'].astype(np.int64)
+        prediction_proba = self.regional_forecaster.predict_proba(data)[:, 1]
+        return [float(p) for p in prediction_proba]
+
 # Instantiate the service
-prediction_service = PredictionService()
\ No newline at end of file
+prediction_service = PredictionService()
@@ -0,0 +1,116 @@
+import numpy as np
+import onnxruntime as ort
+from pathlib import Path
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from tokenizers import Tokenizer
+
+HF_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+MAX_SEQ_LENGTH = 256  # max_seq_length of all-MiniLM-L6-v2 in sentence-transformers
+
+
+def export_minilm_onnx(model_dir, onnx_path, quantized_path=None, model_id: str = HF_MODEL_ID, opset: int = 14):
+    """
+    Exports the MiniLM encoder (token embeddings only; pooling runs in NumPy)
+    to ONNX together with its tokenizer.json, and, if `quantized_path` is
+    given, also writes a dynamically int8-quantized copy.
+    PyTorch is only needed here, not at inference time.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from app.services.nlp_onnx import quantize_nlp_onnx
+
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Exporting {model_id} to ONNX: {onnx_path}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    tokenizer.save_pretrained(str(model_dir))  # tokenizer.json is all the runtime needs
+    model = AutoModel.from_pretrained(model_id)
+    model.eval()
+
+    dummy = tokenizer(["export sample text", "a second, longer export sample text"], padding=True, return_tensors="pt")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            str(onnx_path),
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "token_type_ids": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset,
+        )
+    print("✅ ONNX export complete")
+
+    if quantized_path is not None:
+        quantize_nlp_onnx(onnx_path, quantized_path)
+
+
+class OnnxMiniLMEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Chroma embedding function that runs all-MiniLM-L6-v2 on onnxruntime.
+    Same math as the sentence-transformers model (mean pooling over the
+    attention mask, then L2 normalization), so vectors stay compatible with an
+    existing collection. Tokenization is batched in the Rust `tokenizers`
+    library; neither PyTorch nor sentence-transformers is imported.
+    """
+
+    def __init__(self, model_dir, onnx_path, batch_size: int = 32, intra_op_threads: int = 0, providers=None):
+        self.batch_size = max(1, batch_size)
+        self.tokenizer = Tokenizer.from_file(str(Path(model_dir) / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        pad_token = "[PAD]"
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad_token), pad_token=pad_token)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = max(0, intra_op_threads)
+        self.session = ort.InferenceSession(
+            str(onnx_path),
+            sess_options=options,
+            providers=providers or ["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _embed(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        hidden = self.session.run(None, feed)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return (pooled / norms).astype(np.float32)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        texts = list(input)
+        vectors = [None] * len(texts)
+        # Batch texts of similar length together so padding stays small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            for i, vector in zip(indices, self._embed([texts[i] for i in indices])):
+                vectors[i] = vector
+        return vectors
+
+
+def compare_embedding_functions(reference, candidate, texts):
+    """
+    Parity check between two embedding functions on the same texts.
+    Returns the minimum / mean cosine similarity between paired vectors.
+    """
+    ref = np.asarray(reference(list(texts)), dtype=np.float64)
+    cand = np.asarray(candidate(list(texts)), dtype=np.float64)
+    cosine = (ref * cand).sum(axis=1) / (np.linalg.norm(ref, axis=1) * np.linalg.norm(cand, axis=1))
+    return {
+        "samples": len(texts),
+        "min_cosine": float(cosine.min()) if len(texts) else 1.0,
+        "mean_cosine": float(cosine.mean()) if len(texts) else 1.0,
+    }
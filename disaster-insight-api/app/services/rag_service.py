@@ -1,12 +1,39 @@
+import hashlib
+import itertools
+import json
+import multiprocessing
 import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 import chromadb
 from chromadb.utils import embedding_functions
-from pypdf import PdfReader
+from app.core.config import (
+    RAG_EMBEDDER_DIR,
+    RAG_EMBEDDER_ONNX_PATH,
+    RAG_EMBEDDER_ONNX_INT8_PATH,
+    RAG_EMBEDDING_BACKEND,
+    RAG_ONNX_BATCH_SIZE,
+    RAG_INGEST_WORKERS,
+    RAG_EMBED_BATCH_SIZE,
+    RAG_CACHE_ENABLED,
+    RAG_QUERY_CACHE_MAX_SIZE,
+    RAG_QUERY_CACHE_TTL_SECONDS,
+    RAG_RETRIEVAL_MODE,
+    RAG_LEXICAL_MAX_TERMS,
+    RAG_HYBRID_CANDIDATES,
+    RAG_RRF_K
+)
+from app.services.bm25_index import BM25Index
+from app.services.cache import LRUCache
+from app.services.ingest_jobs import IngestionJobManager
+from app.services.model_registry import model_registry
+from app.services.pdf_extract import extract_chunks
 
 # --- CONFIGURATION ---
-EMBEDDING_FUNC = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="all-MiniLM-L6-v2"
-)
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
 
 # --- MODIFIED CONFIGURATION ---
 # Detect if running on Hugging Face or Local
@@ -18,83 +45,447 @@ else:
 
 DOCS_PATH = "documents"
 
-# Initialize Client
-chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
-collection = chroma_client.get_or_create_collection(
-    name="disaster_protocols",
-    embedding_function=EMBEDDING_FUNC
-)
+_embedding_func = None  # set with the collection; queries embed through it directly so embeddings can be cached
+
+def _build_embedding_function():
+    """sentence-transformers by default; the ONNX backends produce the same vectors without PyTorch."""
+    if RAG_EMBEDDING_BACKEND in ("onnx", "onnx-int8"):
+        from app.services.rag_onnx import OnnxMiniLMEmbeddingFunction, export_minilm_onnx
+        from app.services.nlp_onnx import quantize_nlp_onnx
+
+        quantized = RAG_EMBEDDING_BACKEND == "onnx-int8"
+        # First run on this node: build the ONNX graph(s) from the Hugging Face weights
+        if not RAG_EMBEDDER_ONNX_PATH.exists():
+            print(f"⚠️ {RAG_EMBEDDER_ONNX_PATH.name} not found, exporting the RAG embedder now...")
+            export_minilm_onnx(RAG_EMBEDDER_DIR, RAG_EMBEDDER_ONNX_PATH)
+        if quantized and not RAG_EMBEDDER_ONNX_INT8_PATH.exists():
+            quantize_nlp_onnx(RAG_EMBEDDER_ONNX_PATH, RAG_EMBEDDER_ONNX_INT8_PATH)
+
+        onnx_path = RAG_EMBEDDER_ONNX_INT8_PATH if quantized else RAG_EMBEDDER_ONNX_PATH
+        print(f"Using ONNX Runtime RAG embedder ({onnx_path.name})")
+        return OnnxMiniLMEmbeddingFunction(RAG_EMBEDDER_DIR, onnx_path, batch_size=RAG_ONNX_BATCH_SIZE)
+
+    return embedding_functions.SentenceTransformerEmbeddingFunction(
+        model_name=EMBEDDING_MODEL_NAME
+    )
+
+# Initialize Client (lazily: the embedding model is only loaded on first use or during warm-up)
+def _load_collection():
+    global _embedding_func
+    print("📚 Loading RAG embedding model and vector store...")
+    embedding_func = _build_embedding_function()
+    _embedding_func = embedding_func
+    chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
+    return chroma_client.get_or_create_collection(
+        name="disaster_protocols",
+        embedding_function=embedding_func
+    )
+
+_collection = model_registry.register("rag_collection", _load_collection)
+
+def get_collection():
+    collection = _collection.get()
+    if collection is None:
+        raise RuntimeError("RAG knowledge base is not available. Check server logs.")
+    return collection
+
+# --- Lexical index ---
+# BM25 over the same chunks, rebuilt from the collection at load and then kept in
+# step by ingestion; not loaded at all in pure vector mode.
+def _load_bm25_index(page_size: int = 1000):
+    collection = get_collection()
+    print("📚 Building BM25 index over the knowledge base...")
+    index = BM25Index()
+    offset = 0
+    while True:
+        page = collection.get(include=["documents"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        index.add(page["ids"], page["documents"])
+        offset += len(page["ids"])
+    print(f"✅ BM25 index ready ({len(index)} chunks)")
+    return index
+
+_bm25_index = model_registry.register("rag_bm25_index", _load_bm25_index, required=False) if RAG_RETRIEVAL_MODE != "vector" else None
+
+def get_bm25_index():
+    """The loaded lexical index, or None (vector-only mode or failed to build)."""
+    return _bm25_index.get() if _bm25_index is not None else None
+
+# --- Query caches ---
+# Query embeddings only depend on the text; retrieval results also depend on the
+# collection, so they are dropped whenever ingestion changes it.
+_query_embedding_cache = LRUCache(
+    maxsize=RAG_QUERY_CACHE_MAX_SIZE, ttl_seconds=RAG_QUERY_CACHE_TTL_SECONDS, name="rag-query-embeddings"
+) if RAG_CACHE_ENABLED else None
+_retrieval_cache = LRUCache(
+    maxsize=RAG_QUERY_CACHE_MAX_SIZE, ttl_seconds=RAG_QUERY_CACHE_TTL_SECONDS, name="rag-retrieval"
+) if RAG_CACHE_ENABLED else None
+_cache_generation = 0  # bumped on every invalidation, so in-flight queries can't re-cache stale results
+_cache_lock = threading.Lock()
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query_text: str) -> str:
+    """Case-folded, whitespace-collapsed query without surrounding punctuation."""
+    return _WHITESPACE_RE.sub(" ", query_text).strip().strip("?!.,;:").strip().casefold()
+
+
+def invalidate_query_cache():
+    global _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        if _retrieval_cache is not None:
+            _retrieval_cache.clear()
+
+
+_route_counts = Counter()  # how uncached queries were answered: lexical / hybrid / vector
+
+
+def get_rag_stats():
+    """Hit rates of the query-embedding and retrieval caches, and retrieval routes."""
+    stats = {
+        "retrieval_mode": RAG_RETRIEVAL_MODE,
+        "routes": dict(_route_counts),
+        "lexical_index": _bm25_index.get().stats() if _bm25_index is not None and _bm25_index.state == "ready" else None,
+        "cache_enabled": RAG_CACHE_ENABLED
+    }
+    if RAG_CACHE_ENABLED:
+        stats.update({
+            "generation": _cache_generation,
+            "query_embeddings": _query_embedding_cache.stats(),
+            "retrieval": _retrieval_cache.stats()
+        })
+    return stats
 
-def ingest_documents():
+MANIFEST_PATH = os.path.join(CHROMA_PATH, "ingest_manifest.json")
+
+
+def _file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_manifest(manifest_path):
+    """filename -> {"sha256", "size", "mtime", "chunk_ids"} for every ingested PDF."""
+    try:
+        with open(manifest_path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable ingest manifest: {e}")
+        return None
+
+
+def _save_manifest(manifest, manifest_path):
+    # Write-then-rename so a crash never leaves a half-written manifest
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+
+def _remove_chunks(collection, filename, entry, index=None):
+    """Deletes a file's chunks; files ingested before the manifest existed are matched by source."""
+    if entry is not None:
+        ids = entry["chunk_ids"]
+    else:
+        ids = collection.get(where={"source": filename}, include=[])["ids"]
+    if ids:
+        collection.delete(ids=ids)
+        if index is not None:
+            index.remove(ids)
+    return len(ids)
+
+
+def _iter_extracted(jobs, workers):
     """
-    Reads PDFs and stores them. (The logic you already have)
+    Yields (filename, (ids, documents, metadatas) or None, error) for each
+    (filename, path) job, in completion order. With several workers PDFs are
+    parsed in a process pool; at most 2 x workers results are in flight, so
+    memory does not grow with the number of files. Workers are spawned, not
+    forked: a fork of this threaded process (models, Chroma, server threads)
+    could inherit a held lock and hang, and would copy the loaded models.
     """
-    if not os.path.exists(DOCS_PATH):
-        print(f"⚠️ Warning: {DOCS_PATH} folder not found.")
-        return
-
-    print("--- 🔄 Starting Document Ingestion... ---")
-    ids = []
-    documents = []
-    metadatas = []
-    
-    # Clean existing data to avoid duplicates if re-running
-    existing_count = collection.count()
-    if existing_count > 0:
-        print(f"Clearing {existing_count} existing documents to rebuild...")
-        # There isn't a direct 'clear' in simple Chroma, so we usually rely on unique IDs
-        # But for this demo, we will just append or overwrite based on logic.
-        # To keep it simple and safe: We proceed.
-
-    for filename in os.listdir(DOCS_PATH):
-        if filename.endswith(".pdf"):
-            file_path = os.path.join(DOCS_PATH, filename)
-            print(f"Processing: {filename}")
-            
+    if workers <= 1 or len(jobs) <= 1:
+        for filename, path in jobs:
             try:
-                reader = PdfReader(file_path)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                
-                # Chunking
-                chunk_size = 1000
-                for i in range(0, len(text), chunk_size):
-                    chunk = text[i:i+chunk_size]
-                    if len(chunk) > 50:
-                        # Use filename + index as ID to ensure uniqueness
-                        ids.append(f"{filename}_{i}")
-                        documents.append(chunk)
-                        metadatas.append({"source": filename})
+                yield filename, extract_chunks(path, filename), None
             except Exception as e:
-                print(f"Error reading {filename}: {e}")
+                yield filename, None, e
+        return
+
+    remaining = iter(jobs)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = {}
+
+        def refill():
+            for filename, path in itertools.islice(remaining, 2 * workers - len(pending)):
+                pending[pool.submit(extract_chunks, path, filename)] = filename
+
+        refill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                filename = pending.pop(future)
+                try:
+                    yield filename, future.result(), None
+                except Exception as e:
+                    yield filename, None, e
+            refill()
+
+
+class _BatchedUpserter:
+    """
+    Buffers chunks across files and upserts them (= embeds them) in fixed-size
+    batches; the lexical index, if any, is updated with each batch.
+    """
 
-    if documents:
+    def __init__(self, collection, batch_size: int, index=None):
+        self.collection = collection
+        self.index = index
+        self.batch_size = max(1, batch_size)
+        self.ids, self.documents, self.metadatas = [], [], []
+        self.written = 0
+
+    def add(self, ids, documents, metadatas):
+        self.ids.extend(ids)
+        self.documents.extend(documents)
+        self.metadatas.extend(metadatas)
+        while len(self.ids) >= self.batch_size:
+            self._upsert(self.batch_size)
+
+    def flush(self):
+        if self.ids:
+            self._upsert(len(self.ids))
+
+    def _upsert(self, n):
         # upsert = update if exists, insert if new
-        collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
-        print(f"✅ Successfully ingested {len(documents)} chunks into ChromaDB.")
-    else:
-        print("⚠️ No PDF documents found to ingest.")
+        self.collection.upsert(ids=self.ids[:n], documents=self.documents[:n], metadatas=self.metadatas[:n])
+        if self.index is not None:
+            self.index.add(self.ids[:n], self.documents[:n])
+        del self.ids[:n], self.documents[:n], self.metadatas[:n]
+        self.written += n
 
-def query_knowledge_base(query_text: str, n_results: int = 2):
-    # ... (Your existing query logic) ...
-    results = collection.query(query_texts=[query_text], n_results=n_results)
-    if not results['documents'] or not results['documents'][0]:
-        return "No specific protocol document found in the database."
-    context = "\n\n".join(results['documents'][0])
-    sources = ", ".join(set([m['source'] for m in results['metadatas'][0]]))
-    return f"Context from ({sources}):\n{context}"
 
-# --- NEW SMART FUNCTION ---
-def initialize_rag_on_startup():
+def ingest_documents(docs_path=DOCS_PATH, collection=None, manifest_path=MANIFEST_PATH,
+                     workers: int = RAG_INGEST_WORKERS, batch_size: int = RAG_EMBED_BATCH_SIZE, progress=None):
     """
-    Called when the API starts. Checks if DB is empty.
+    Incrementally syncs the vector store with the PDFs in `docs_path`.
+    A manifest of per-file content hashes and chunk IDs decides what to do:
+    new and changed PDFs are (re-)embedded, chunks of changed and deleted PDFs
+    are removed, unchanged PDFs are skipped without being read.
+    PDFs are parsed in a process pool and chunks are embedded / upserted in
+    batches of `batch_size`. `progress(**fields)`, if given, receives
+    files_total / files_done / chunks_embedded / error updates as work proceeds.
+    Returns a report of files and chunks added / updated / removed.
     """
+    report = {
+        "files": {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "failed": 0},
+        "chunks": {"added": 0, "updated": 0, "removed": 0},
+        "errors": [],
+        "seconds": 0.0
+    }
+    if not os.path.exists(docs_path):
+        print(f"⚠️ Warning: {docs_path} folder not found.")
+        return report
+
+    print("--- 🔄 Starting Document Ingestion... ---")
+    started = time.perf_counter()
+    # The shared lexical index follows the shared collection only; loading it here
+    # first means it is built from the state before this run's changes
+    index = get_bm25_index() if collection is None else None
+    collection = collection if collection is not None else get_collection()
+
+    manifest = _load_manifest(manifest_path)
     count = collection.count()
     print(f"📊 Current RAG Database Count: {count} chunks")
-    
     if count == 0:
-        print("🚀 Database is empty. Auto-triggering ingestion...")
-        ingest_documents()
+        manifest = {}  # the store was wiped: the manifest no longer describes it
+    legacy = manifest is None  # store built before manifests: match old chunks by source
+    manifest = manifest or {}
+
+    current = sorted(f for f in os.listdir(docs_path) if f.endswith(".pdf"))
+
+    # Decide what needs (re-)embedding; cheap size/mtime check first, hash only when those moved
+    changed = {}
+    for filename in current:
+        file_path = os.path.join(docs_path, filename)
+        entry = manifest.get(filename)
+        stat = os.stat(file_path)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            report["files"]["unchanged"] += 1
+            continue
+        sha256 = _file_sha256(file_path)
+        if entry and entry["sha256"] == sha256:
+            entry["size"], entry["mtime"] = stat.st_size, stat.st_mtime
+            report["files"]["unchanged"] += 1
+            continue
+        changed[filename] = (file_path, sha256, stat)
+
+    progress = progress or (lambda **fields: None)
+    progress(files_total=len(changed))
+
+    upserter = _BatchedUpserter(collection, batch_size, index)
+    jobs = [(filename, file_path) for filename, (file_path, _, _) in changed.items()]
+    for files_done, (filename, result, error) in enumerate(_iter_extracted(jobs, workers), start=1):
+        if error is not None:
+            # Keep the previous version's chunks; the file is retried on the next run
+            print(f"Error reading {filename}: {error}")
+            report["files"]["failed"] += 1
+            report["errors"].append({"file": filename, "error": str(error)})
+            progress(files_done=files_done, error=report["errors"][-1])
+            continue
+
+        print(f"Processing: {filename}")
+        ids, documents, metadatas = result
+        _, sha256, stat = changed[filename]
+        entry = manifest.get(filename)
+
+        # Old chunks go before the new ones are queued: IDs are reused across versions
+        removed = _remove_chunks(collection, filename, entry, index) if entry is not None or legacy else 0
+        upserter.add(ids, documents, metadatas)
+
+        manifest[filename] = {"sha256": sha256, "size": stat.st_size, "mtime": stat.st_mtime, "chunk_ids": ids}
+        report["chunks"]["removed"] += removed
+        if entry is not None or (legacy and removed):
+            report["files"]["updated"] += 1
+            report["chunks"]["updated"] += len(ids)
+        else:
+            report["files"]["added"] += 1
+            report["chunks"]["added"] += len(ids)
+        progress(files_done=files_done, chunks_embedded=upserter.written)
+    upserter.flush()
+    progress(chunks_embedded=upserter.written)
+
+    # Files that disappeared from docs_path
+    deleted = set(manifest) - set(current)
+    if legacy:
+        sources = {m["source"] for m in collection.get(include=["metadatas"])["metadatas"] if m}
+        deleted |= sources - set(current)
+    for filename in sorted(deleted):
+        print(f"Removing chunks of deleted file: {filename}")
+        report["chunks"]["removed"] += _remove_chunks(collection, filename, manifest.pop(filename, None), index)
+        report["files"]["removed"] += 1
+
+    _save_manifest(manifest, manifest_path)
+    if any(report["files"][k] for k in ("added", "updated", "removed")):
+        invalidate_query_cache()
+    report["seconds"] = round(time.perf_counter() - started, 3)
+
+    files, chunks = report["files"], report["chunks"]
+    print(f"✅ Ingestion complete in {report['seconds']:.1f}s: files +{files['added']} ~{files['updated']} "
+          f"-{files['removed']} ({files['unchanged']} unchanged, {files['failed']} failed); "
+          f"chunks +{chunks['added']} ~{chunks['updated']} -{chunks['removed']}")
+    return report
+
+def _embed_query(key: str):
+    """Embedding of a normalized query; the text embedded is the cache key itself,
+    so every spelling variant of a query gets the same vector."""
+    if _query_embedding_cache is not None:
+        embedding = _query_embedding_cache.get(key)
+        if embedding is not None:
+            return embedding
+    embedding = [float(x) for x in _embedding_func([key])[0]]
+    if _query_embedding_cache is not None:
+        _query_embedding_cache.set(key, embedding)
+    return embedding
+
+def _vector_search(collection, key: str, n: int):
+    results = collection.query(query_embeddings=[_embed_query(key)], n_results=n)
+    if not results['documents'] or not results['documents'][0]:
+        return []
+    return list(zip(results['ids'][0], results['documents'][0], results['metadatas'][0]))
+
+def _fetch_chunks(collection, ids):
+    """(id, document, metadata) for `ids`, in the given order."""
+    if not ids:
+        return []
+    found = collection.get(ids=list(ids), include=["documents", "metadatas"])
+    by_id = {i: (i, d, m) for i, d, m in zip(found["ids"], found["documents"], found["metadatas"])}
+    return [by_id[i] for i in ids if i in by_id]
+
+def retrieve(query_text: str, n_results: int = 2, mode: str = None):
+    """
+    Returns (route, [(id, document, metadata)]) for the top `n_results` chunks.
+
+    mode "vector" is embedding + ANN search only, "lexical" is BM25 only.
+    "hybrid" answers short keyword queries straight from BM25 when every top
+    hit contains every query term (no embedding at all), and otherwise fuses
+    the BM25 and vector rankings with reciprocal rank fusion. Both rankings
+    use the normalized query, so results depend only on the cache key.
+    """
+    mode = mode or RAG_RETRIEVAL_MODE
+    collection = get_collection()
+    key = normalize_query(query_text)
+    index = get_bm25_index() if mode != "vector" else None
+    if index is None:
+        return "vector", _vector_search(collection, key, n_results)
+
+    candidates = max(n_results, RAG_HYBRID_CANDIDATES)
+    terms, lexical = index.search(key, candidates)
+    top = lexical[:n_results]
+    confident = (
+        0 < len(terms) <= RAG_LEXICAL_MAX_TERMS
+        and len(top) == n_results
+        and all(matched == len(terms) for _, _, matched in top)
+    )
+    if mode == "lexical" or confident:
+        return "lexical", _fetch_chunks(collection, [doc_id for doc_id, _, _ in top])
+
+    vector = _vector_search(collection, key, candidates)
+    fused = {}
+    for ranking in ([doc_id for doc_id, _, _ in lexical], [doc_id for doc_id, _, _ in vector]):
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (RAG_RRF_K + rank + 1)
+    best = sorted(fused, key=fused.get, reverse=True)[:n_results]
+
+    known = {chunk[0]: chunk for chunk in vector}
+    known.update({chunk[0]: chunk for chunk in _fetch_chunks(collection, [i for i in best if i not in known])})
+    return "hybrid", [known[i] for i in best if i in known]
+
+def query_knowledge_base(query_text: str, n_results: int = 2):
+    """
+    Top-n protocol chunks for a question, formatted as context for the agent.
+    Results are cached per (normalized query, n_results) until the next ingestion change.
+    """
+    key = normalize_query(query_text)
+    generation = _cache_generation
+    if _retrieval_cache is not None:
+        cached = _retrieval_cache.get((key, n_results))
+        if cached is not None:
+            return cached
+
+    route, chunks = retrieve(query_text, n_results)
+    _route_counts[route] += 1
+    if not chunks:
+        answer = "No specific protocol document found in the database."
     else:
-        print("✅ RAG Database is ready. Skipping ingestion.")
\ No newline at end of file
+        context = "\n\n".join(document for _, document, _ in chunks)
+        sources = ", ".join(set([m['source'] for _, _, m in chunks]))
+        answer = f"Context from ({sources}):\n{context}"
+
+    if _retrieval_cache is not None:
+        with _cache_lock:
+            if generation == _cache_generation:
+                _retrieval_cache.set((key, n_results), answer)
+    return answer
+
+# Background ingestion: one job at a time, queries keep being served meanwhile
+ingestion_jobs = IngestionJobManager(ingest_documents)
+
+# --- NEW SMART FUNCTION ---
+def initialize_rag_on_startup():
+    """
+    Called when the API starts. Syncs the DB with /documents as a background
+    job (which loads the collection if warm-up has not) so it never holds up
+    startup or readiness; unchanged PDFs are skipped, so this is cheap when
+    nothing was edited.
+    """
+    job = ingestion_jobs.start(trigger="startup")
+    print(f"🚀 Knowledge base sync started in the background (job {job.job_id})")
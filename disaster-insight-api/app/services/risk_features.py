@@ -0,0 +1,106 @@
+import numpy as np
+
+# API field name -> column name the risk pipeline was trained on
+RISK_FIELD_TO_COLUMN = {
+    "start_year": "Start Year",
+    "start_month": "Start Month",
+    "disaster_group": "Disaster Group",
+    "disaster_subgroup": "Disaster Subgroup",
+    "disaster_type": "Disaster Type",
+    "country": "Country",
+    "region": "Region"
+}
+
+
+def to_risk_record(fields: dict) -> dict:
+    """Renames API request fields to the pipeline's training column names."""
+    return {RISK_FIELD_TO_COLUMN.get(k, k): v for k, v in fields.items()}
+
+
+class RiskFeatureEncoder:
+    """
+    DataFrame-free encoder for the static risk pipeline.
+
+    Reads the fitted StandardScaler statistics and OneHotEncoder categories out of
+    the pipeline's ColumnTransformer and writes rows straight into the float64
+    matrix the transformer would have produced, then calls the XGBoost step.
+    Raises ValueError for pipeline layouts it cannot reproduce exactly.
+    """
+
+    def __init__(self, pipeline):
+        steps = getattr(pipeline, "named_steps", None)
+        if not steps or "preprocessor" not in steps:
+            raise ValueError("pipeline has no 'preprocessor' step")
+        preprocessor = steps["preprocessor"]
+        self.classifier = pipeline.steps[-1][1]
+
+        self._blocks = []  # (kind, columns, params, offset)
+        offset = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            columns = list(columns)
+            if transformer == "drop" or not columns:
+                continue
+            kind = type(transformer).__name__
+            if kind == "StandardScaler":
+                params = (transformer.mean_, transformer.scale_)
+                width = len(columns)
+            elif kind == "OneHotEncoder":
+                if getattr(transformer, "drop_idx_", None) is not None:
+                    raise ValueError("OneHotEncoder with drop is not supported")
+                if getattr(transformer, "_infrequent_enabled", False):
+                    raise ValueError("OneHotEncoder with infrequent categories is not supported")
+                if transformer.handle_unknown != "ignore":
+                    raise ValueError("OneHotEncoder must use handle_unknown='ignore'")
+                params = []
+                width = 0
+                for categories in transformer.categories_:
+                    params.append(({c: width + i for i, c in enumerate(categories)}))
+                    width += len(categories)
+            else:
+                raise ValueError(f"unsupported transformer '{name}' ({kind})")
+            self._blocks.append((kind, columns, params, offset))
+            offset += width
+
+        self.n_features = offset
+        self.columns = [c for _, columns, _, _ in self._blocks for c in columns]
+
+    def encode(self, records: list) -> np.ndarray:
+        """Encodes a list of records (keyed by training column names)."""
+        X = np.zeros((len(records), self.n_features), dtype=np.float64)
+        for kind, columns, params, offset in self._blocks:
+            if kind == "StandardScaler":
+                mean, scale = params
+                block = np.array([[r[c] for c in columns] for r in records], dtype=np.float64)
+                if mean is not None:
+                    block -= mean
+                if scale is not None:
+                    block /= scale
+                X[:, offset:offset + len(columns)] = block
+            else:
+                for column, positions in zip(columns, params):
+                    for row, record in enumerate(records):
+                        position = positions.get(record[column])
+                        if position is not None:  # unknown categories encode to all zeros
+                            X[row, offset + position] = 1.0
+        return X
+
+    def predict_proba(self, records: list) -> np.ndarray:
+        """Positive-class probability for each record."""
+        return self.classifier.predict_proba(self.encode(records))[:, 1]
+
+    def probe_records(self, n: int = 4) -> list:
+        """A few synthetic records spanning the known categories, for parity checks."""
+        records = []
+        for i in range(n):
+            record = {}
+            for kind, columns, params, _ in self._blocks:
+                if kind == "StandardScaler":
+                    mean = params[0]
+                    for j, column in enumerate(columns):
+                        record[column] = (float(mean[j]) if mean is not None else 0.0) + i
+                else:
+                    for column, positions in zip(columns, params):
+                        categories = list(positions)
+                        record[column] = categories[(i * 7) % len(categories)]
+            records.append(record)
+        return records
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+YEAR_COLUMN = "Start Year"
+MONTH_COLUMN = "Start Month"
+# Full axes of the table: every known value of these, x 12 months
+GRID_COLUMNS = ("Country", "Disaster Type", "Disaster Subgroup")
+
+
+def model_fingerprint(model_path) -> str:
+    """SHA-256 of the serialized pipeline, used to detect a stale table."""
+    return hashlib.sha256(Path(model_path).read_bytes()).hexdigest()
+
+
+def _categorical_axes(pipeline) -> dict:
+    """Column -> known categories, read from the fitted OneHotEncoder(s)."""
+    preprocessor = pipeline.named_steps["preprocessor"]
+    axes = {}
+    for _, transformer, columns in preprocessor.transformers_:
+        if type(transformer).__name__ != "OneHotEncoder":
+            continue
+        for column, categories in zip(columns, transformer.categories_):
+            # NaN is not a usable lookup key and would not round-trip through JSON
+            axes[column] = [c.item() if hasattr(c, "item") else c for c in categories if c == c]
+    return axes
+
+
+class RiskLookupTable:
+    """
+    Dense, array-backed table of risk probabilities over country x type x
+    subgroup x month (plus the configured context values) for one start year.
+    Each axis maps a value to an index, so a lookup is a handful of dict hits
+    plus one array read.
+    """
+
+    def __init__(self, axes: dict, fixed: dict, probabilities: np.ndarray, fingerprint: str):
+        self.axes = axes
+        self.fixed = fixed
+        self.probabilities = probabilities
+        self.fingerprint = fingerprint
+        self._index = [(column, {v: i for i, v in enumerate(values)}) for column, values in axes.items()]
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()  # lookups come from many request threads
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def lookup(self, record: dict):
+        """Returns the stored probability, or None if the record is outside the grid."""
+        for column, value in self.fixed.items():
+            if record.get(column) != value:
+                self._count(False)
+                return None
+        position = []
+        for column, index in self._index:
+            i = index.get(record.get(column))
+            if i is None:
+                self._count(False)
+                return None
+            position.append(i)
+        self._count(True)
+        return float(self.probabilities[tuple(position)])
+
+    def is_fresh(self, fingerprint: str, year: int, context: dict) -> bool:
+        """True if built from this model, for this year, over the same context values."""
+        return (
+            self.fingerprint == fingerprint
+            and self.fixed.get(YEAR_COLUMN) == year
+            and all(self.axes.get(column) == list(values) for column, values in context.items())
+        )
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "cells": int(self.probabilities.size),
+            "memory_mb": round(self.probabilities.nbytes / 1e6, 2),
+            "year": self.fixed.get(YEAR_COLUMN),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+    def save(self, path):
+        meta = {"axes": self.axes, "fixed": self.fixed, "fingerprint": self.fingerprint}
+        np.savez_compressed(str(path), probabilities=self.probabilities, meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(str(path), allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            probabilities = data["probabilities"]
+        return cls(meta["axes"], meta["fixed"], probabilities, meta["fingerprint"])
+
+
+def build_risk_table(pipeline, year: int, fingerprint: str, context: dict,
+                     chunk_size: int = 200_000, max_cells: int = 5_000_000):
+    """
+    Evaluates the risk pipeline over every known country x disaster type x
+    subgroup x month for `year`. The remaining categorical columns (group,
+    region) only take the values listed in `context` ({column: [values]}),
+    e.g. what the agent's risk tool sends; records with other values fall back
+    to live inference. Chunks are scored through the pipeline itself, so stored
+    values are exactly what live inference returns.
+    """
+    known = _categorical_axes(pipeline)
+    axes = {}
+    for column, categories in known.items():
+        if column in GRID_COLUMNS:
+            axes[column] = categories
+        elif column in context:
+            axes[column] = list(context[column])
+        else:
+            raise ValueError(f"no table context values configured for '{column}'")
+    axes[MONTH_COLUMN] = list(range(1, 13))
+    shape = tuple(len(values) for values in axes.values())
+    cells = int(np.prod(shape))
+    if cells > max_cells:
+        raise ValueError(f"risk grid has {cells:,} cells, above the {max_cells:,} limit")
+
+    print(f"Building risk lookup table for {year}: {' x '.join(map(str, shape))} = {cells:,} cells...")
+    start = time.perf_counter()
+    columns = list(axes)
+    axis_values = [np.asarray(axes[c], dtype=object) for c in columns]
+    probabilities = np.empty(cells, dtype=np.float32)
+
+    for begin in range(0, cells, chunk_size):
+        flat = np.arange(begin, min(begin + chunk_size, cells))
+        indices = np.unravel_index(flat, shape)
+        frame = pd.DataFrame({c: values[idx] for c, values, idx in zip(columns, axis_values, indices)})
+        frame[MONTH_COLUMN] = frame[MONTH_COLUMN].astype(int)
+        frame[YEAR_COLUMN] = year
+        probabilities[begin:begin + len(flat)] = pipeline.predict_proba(frame)[:, 1]
+
+    print(f"✅ Risk lookup table built in {time.perf_counter() - start:.1f}s")
+    return RiskLookupTable(axes, {YEAR_COLUMN: year}, probabilities.reshape(shape), fingerprint)
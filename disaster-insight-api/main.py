@@ -6,16 +6,20 @@ import os
 # 1️⃣ Load environment variables FIRST, before importing other modules
 load_dotenv()
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from contextlib import asynccontextmanager
 from app.api.v1 import endpoints  # safe to import now
 from logging.config import dictConfig
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.logging_config import LOGGING_CONFIG
+from app.core.config import MODEL_WARMUP_ON_STARTUP, MODEL_WARMUP_WORKERS
+from app.services.model_registry import model_registry
+from app.services.cv_service import cv_executor
+from app.services.agent_service import agent_executor
 import logging
 
 # Import the smart startup function from your service
-from app.services.rag_service import initialize_rag_on_startup
+from app.services.rag_service import initialize_rag_on_startup, ingestion_jobs
 
 # 2️⃣ Apply logging configuration
 dictConfig(LOGGING_CONFIG)
@@ -28,17 +32,25 @@ logger = logging.getLogger("app")
 async def lifespan(app: FastAPI):
     """
     Runs before the API starts receiving requests.
-    Perfect place to initialize models or ingest data.
+    Models are warmed up in parallel in the background so uvicorn can accept
+    connections immediately; /ready reports when they are loaded.
     """
-    try:
-        logger.info("🚀 API Startup: Checking RAG Knowledge Base...")
-        initialize_rag_on_startup()
-    except Exception as e:
-        logger.error(f"⚠️ RAG Initialization failed: {e}")
+    if MODEL_WARMUP_ON_STARTUP:
+        logger.info("🚀 API Startup: Warming up models in the background...")
+        model_registry.warm_up(max_workers=MODEL_WARMUP_WORKERS)
+    else:
+        logger.info("🚀 API Startup: Models will load lazily on first use.")
+
+    # Always sync the RAG Knowledge Base with /documents (a background job; returns immediately)
+    initialize_rag_on_startup()
     
     yield  # the API runs here
     
     # Cleanup after shutdown
+    model_registry.shutdown()
+    cv_executor.shutdown()
+    agent_executor.shutdown()
+    ingestion_jobs.shutdown()
     logger.info("🛑 API Shutdown.")
 
 # --- Initialize FastAPI App ---
@@ -72,6 +84,18 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+# --- Readiness Endpoint ---
+@app.get("/ready", tags=["Health"])
+def readiness_check(response: Response):
+    """
+    Per-model load state and timings. Returns 503 while the startup warm-up is
+    still running and when a required model failed to load.
+    """
+    status = model_registry.status()
+    if not status["ready"]:
+        response.status_code = 503
+    return status
+
 # --- Local Dev Entrypoint ---
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 7860))
@@ -0,0 +1,129 @@
+"""
+Regression report for the int8 damage classifier against fp32:
+top-1 agreement, per-class confidence drift on the five triage classes,
+and latency / memory side by side. Build the int8 model first with
+scripts/quantize_cv_model.py, and evaluate on images that were NOT used for
+calibration.
+
+Usage (from disaster-insight-api/):
+    python scripts/benchmark_cv_int8.py --eval-dir path/to/images [--max-images 500]
+        [--rounds 30] [--batch-sizes 1 16]
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import onnxruntime as ort
+
+from app.services.cv_service import (
+    DamageAssessmentService,
+    CLASS_INDICES_PATH,
+    IMAGE_EXTENSIONS,
+    MODEL_PATH,
+    MODEL_INT8_PATH
+)
+from app.services.cv_quantization import compare_cv_models, find_images, iter_image_batches
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc; peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def load_session(path, batch: np.ndarray):
+    """Session plus the RSS it added, including the arena grown by a first run."""
+    gc.collect()
+    before = rss_mb()
+    session = ort.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+    session.run(None, {session.get_inputs()[0].name: batch})
+    return session, rss_mb() - before
+
+
+def bench(session, batch: np.ndarray, rounds: int):
+    feed = {session.get_inputs()[0].name: batch}
+    session.run(None, feed)  # warm-up
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        session.run(None, feed)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[int(0.95 * (len(timings) - 1))] * 1000,
+        "images_per_s": len(batch) / statistics.mean(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eval-dir", required=True, type=Path)
+    parser.add_argument("--max-images", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16])
+    args = parser.parse_args()
+
+    if not MODEL_INT8_PATH.exists():
+        sys.exit(f"❌ {MODEL_INT8_PATH.name} not found; run scripts/quantize_cv_model.py first")
+
+    paths = find_images(args.eval_dir, IMAGE_EXTENSIONS, args.max_images)
+    decode = DamageAssessmentService()._decode_image
+    batches = list(iter_image_batches(paths, decode, batch_size=max(args.batch_sizes)))
+    if not batches:
+        sys.exit(f"❌ No readable images in {args.eval_dir}")
+    with open(CLASS_INDICES_PATH) as f:
+        class_indices = json.load(f)
+
+    probe = batches[0][1][:1]
+    sessions, memory_mb = {}, {}
+    for name, path in (("fp32", MODEL_PATH), ("int8", MODEL_INT8_PATH)):
+        sessions[name], memory_mb[name] = load_session(path, probe)
+    input_name = sessions["fp32"].get_inputs()[0].name
+
+    report = compare_cv_models(
+        lambda b: sessions["fp32"].run(None, {input_name: b})[0],
+        lambda b: sessions["int8"].run(None, {input_name: b})[0],
+        batches,
+        class_indices
+    )
+
+    print(f"\n--- Accuracy vs. fp32 ({report['samples']} images) ---")
+    print(f"Top-1 agreement: {report['top1_agreement']:.2%}")
+    print(f"{'class':16s} {'n':>5s} {'agree':>7s} {'conf fp32':>10s} {'conf int8':>10s} {'mean |Δ|':>9s} {'max |Δ|':>8s}")
+    for label, c in report["per_class"].items():
+        if not c["samples"]:
+            print(f"{label:16s} {0:5d} {'-':>7s}")
+            continue
+        print(f"{label:16s} {c['samples']:5d} {c['top1_agreement']:7.2%} {c['mean_confidence_reference']:10.4f} "
+              f"{c['mean_confidence_candidate']:10.4f} {c['mean_abs_drift']:9.4f} {c['max_abs_drift']:8.4f}")
+    for pair, count in sorted(report["disagreements"].items(), key=lambda kv: -kv[1]):
+        print(f"  flipped {pair}: {count}")
+
+    print("\n--- Latency / memory ---")
+    print(f"{'model':6s} {'batch':>5s} {'p50 ms':>9s} {'p95 ms':>9s} {'img/s':>8s}")
+    pool = np.concatenate([b for _, b in batches])
+    for name, session in sessions.items():
+        for batch_size in args.batch_sizes:
+            batch = np.resize(pool, (batch_size,) + pool.shape[1:])
+            r = bench(session, batch, args.rounds)
+            print(f"{name:6s} {batch_size:5d} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['images_per_s']:8.1f}")
+    for name, path in (("fp32", MODEL_PATH), ("int8", MODEL_INT8_PATH)):
+        print(f"{name}: file {path.stat().st_size / 1e6:.1f} MB, "
+              f"RSS added by session + first run {memory_mb[name]:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Decode + preprocess cost per image: the original path vs. the fast path
+(reduced-scale JPEG decode, reusable input buffer, optional uint8 input).
+
+Reports wall time and peak traced memory per image. tracemalloc sees NumPy
+allocations but not Pillow's internal image buffers, so the decoded image
+size is printed separately to show what draft decoding saves.
+
+Usage (from disaster-insight-api/):
+    python scripts/benchmark_cv_preprocess.py [--width 4000 --height 3000] [--rounds 20]
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from PIL import Image
+
+from app.services.cv_service import DamageAssessmentService, IMAGE_SIZE
+
+
+def legacy_preprocess(image_bytes: bytes):
+    """The preprocessing the service used before the fast path existed."""
+    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    img = img.resize((224, 224))
+    img_array = np.array(img).astype("float32") / 255.0
+    return np.expand_dims(img_array, axis=0)
+
+
+def synthetic_photo(width: int, height: int) -> bytes:
+    # Smooth gradients + noise compress like a real photo rather than pure noise
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([(x * 255 // width), (y * 255 // height), ((x + y) * 255 // (width + height))], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def measure(fn, image_bytes: bytes, rounds: int):
+    fn(image_bytes)  # warm-up (allocates the reusable buffer once)
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(image_bytes)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(image_bytes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings) * 1000, peak / 1e6
+
+
+def decoded_size(image_bytes: bytes, draft: bool):
+    img = Image.open(io.BytesIO(image_bytes))
+    if draft:
+        img.draft("RGB", IMAGE_SIZE)
+    img.load()
+    return img.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    image_bytes = synthetic_photo(args.width, args.height)
+    print(f"Synthetic JPEG: {args.width}x{args.height}, {len(image_bytes) / 1e6:.1f} MB")
+
+    variants = [("legacy", legacy_preprocess)]
+    for name, fast, uint8 in (("buffer", False, False), ("fast", True, False), ("fast+uint8", True, True)):
+        service = DamageAssessmentService()
+        service.fast_preprocess, service.uint8_input = fast, uint8
+        variants.append((name, service._preprocess_image))
+
+    reference = legacy_preprocess(image_bytes)
+    print(f"\n{'variant':11s} {'ms/image':>9s} {'peak MB':>8s} {'max |Δ| vs legacy':>18s}")
+    for name, fn in variants:
+        ms, peak_mb = measure(fn, image_bytes, args.rounds)
+        output = fn(image_bytes)
+        output = output.astype(np.float32) / 255.0 if output.dtype == np.uint8 else output
+        print(f"{name:11s} {ms:9.2f} {peak_mb:8.2f} {float(np.abs(output - reference).max()):18.5f}")
+
+    full, reduced = decoded_size(image_bytes, False), decoded_size(image_bytes, True)
+    print(f"\nDecoded resolution: full {full[0]}x{full[1]} "
+          f"({full[0] * full[1] * 3 / 1e6:.1f} MB RGB) vs. draft {reduced[0]}x{reduced[1]} "
+          f"({reduced[0] * reduced[1] * 3 / 1e6:.2f} MB RGB)")
+
+
+if __name__ == "__main__":
+    main()
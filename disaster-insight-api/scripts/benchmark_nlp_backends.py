@@ -0,0 +1,80 @@
+"""
+Latency / throughput comparison of the tweet classifier backends
+(PyTorch pipeline vs. ONNX Runtime fp32 vs. ONNX Runtime int8).
+Run scripts/export_nlp_onnx.py first.
+
+Usage (from disaster-insight-api/):
+    python scripts/benchmark_nlp_backends.py [--rounds 50] [--batch-sizes 1 8 32]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+
+from app.core.config import NLP_MODEL_PATH, NLP_ONNX_PATH, NLP_ONNX_INT8_PATH
+from app.services.nlp_onnx import OnnxTextClassifier
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from export_nlp_onnx import SAMPLE_TEXTS
+
+
+def _load_backends():
+    model_path_str = str(NLP_MODEL_PATH)
+    backends = {
+        "pytorch": pipeline(
+            "text-classification",
+            model=AutoModelForSequenceClassification.from_pretrained(model_path_str),
+            tokenizer=AutoTokenizer.from_pretrained(model_path_str)
+        )
+    }
+    for name, path in (("onnx", NLP_ONNX_PATH), ("onnx-int8", NLP_ONNX_INT8_PATH)):
+        if path.exists():
+            backends[name] = OnnxTextClassifier(NLP_MODEL_PATH, path)
+        else:
+            print(f"⚠️ Skipping {name}: {path.name} not found")
+    return backends
+
+
+def bench(classifier, batch_size: int, rounds: int):
+    texts = (SAMPLE_TEXTS * (batch_size // len(SAMPLE_TEXTS) + 1))[:batch_size]
+    classifier(texts, batch_size=batch_size, truncation=True)  # warm-up
+
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        classifier(texts, batch_size=batch_size, truncation=True)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[int(0.95 * (len(timings) - 1))] * 1000,
+        "texts_per_s": batch_size / statistics.mean(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    backends = _load_backends()
+    print(f"\n{'backend':10s} {'batch':>5s} {'p50 ms':>9s} {'p95 ms':>9s} {'texts/s':>9s}")
+    for name, classifier in backends.items():
+        for batch_size in args.batch_sizes:
+            r = bench(classifier, batch_size, args.rounds)
+            print(f"{name:10s} {batch_size:5d} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['texts_per_s']:9.1f}")
+
+    for name, path in (("onnx", NLP_ONNX_PATH), ("onnx-int8", NLP_ONNX_INT8_PATH)):
+        if path.exists():
+            print(f"{name} model size: {path.stat().st_size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Embedding backends for the knowledge base side by side: sentence-transformers
+vs. ONNX Runtime fp32 vs. int8. Reports ingestion throughput (chunks/s for
+1000-character chunks in RAG_EMBED_BATCH_SIZE batches), per-query embed
+latency and process RSS. Each backend runs in its own subprocess, so RSS
+includes everything that backend imports (e.g. PyTorch).
+Run scripts/export_rag_embedder.py first.
+
+Usage (from disaster-insight-api/):
+    python scripts/benchmark_rag_embedders.py [--chunks 512] [--queries 200]
+"""
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BACKENDS = ("sentence-transformers", "onnx", "onnx-int8")
+QUERIES = ["earthquake kit", "flood evacuation", "tsunami warning", "CPR steps", "wildfire smoke mask",
+           "how to purify drinking water", "what to do after an aftershock", "shelter in place"]
+WORDS = ("evacuation shelter earthquake flood tsunami protocol emergency rescue first aid "
+         "water supply medical kit route assembly point warning siren aftershock hazard").split()
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_backend(name: str):
+    from app.core.config import RAG_EMBEDDER_DIR, RAG_EMBEDDER_ONNX_PATH, RAG_EMBEDDER_ONNX_INT8_PATH
+    if name == "sentence-transformers":
+        from chromadb.utils import embedding_functions
+        from app.services.rag_service import EMBEDDING_MODEL_NAME
+        return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL_NAME)
+    from app.services.rag_onnx import OnnxMiniLMEmbeddingFunction
+    path = RAG_EMBEDDER_ONNX_INT8_PATH if name == "onnx-int8" else RAG_EMBEDDER_ONNX_PATH
+    if not path.exists():
+        raise SystemExit(f"{path.name} not found; run scripts/export_rag_embedder.py")
+    return OnnxMiniLMEmbeddingFunction(RAG_EMBEDDER_DIR, path)
+
+
+def run_child(name: str, n_chunks: int, n_queries: int, batch_size: int):
+    baseline = rss_mb()
+    embed = load_backend(name)
+    rng = random.Random(0)
+    chunks = []
+    for _ in range(n_chunks):
+        text = ""
+        while len(text) < 1000:
+            text += rng.choice(WORDS) + " "
+        chunks.append(text[:1000])
+
+    embed(chunks[:batch_size])  # warm-up
+    start = time.perf_counter()
+    for i in range(0, len(chunks), batch_size):
+        embed(chunks[i:i + batch_size])
+    ingest_seconds = time.perf_counter() - start
+
+    timings = []
+    for i in range(n_queries):
+        query = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        embed([query])
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    print(json.dumps({
+        "chunks_per_s": n_chunks / ingest_seconds,
+        "query_p50_ms": statistics.median(timings) * 1000,
+        "query_p95_ms": timings[int(0.95 * (len(timings) - 1))] * 1000,
+        "rss_mb": rss_mb(),
+        "rss_added_mb": rss_mb() - baseline,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=None, help="Defaults to RAG_EMBED_BATCH_SIZE")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.batch_size is None:
+        from app.core.config import RAG_EMBED_BATCH_SIZE
+        args.batch_size = RAG_EMBED_BATCH_SIZE
+
+    if args.child:
+        run_child(args.child, args.chunks, args.queries, args.batch_size)
+        return
+
+    print(f"{'backend':22s} {'chunks/s':>9s} {'query p50':>10s} {'query p95':>10s} {'RSS MB':>8s} {'added MB':>9s}")
+    for name in args.backends:
+        result = subprocess.run(
+            [sys.executable, __file__, "--child", name, "--chunks", str(args.chunks),
+             "--queries", str(args.queries), "--batch-size", str(args.batch_size)],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"{name:22s} failed: {result.stderr.strip().splitlines()[-1] if result.stderr else result.returncode}")
+            continue
+        r = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{name:22s} {r['chunks_per_s']:9.1f} {r['query_p50_ms']:8.2f}ms {r['query_p95_ms']:8.2f}ms "
+              f"{r['rss_mb']:8.0f} {r['rss_added_mb']:9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Ingestion throughput on a synthetic PDF corpus: serial vs. process-pool
+extraction, then a full ingest (extraction + embedding + upsert) into a
+throwaway Chroma store, with peak RSS.
+
+The PDFs are generated here with plain PDF syntax, so no extra dependency
+is needed. The real documents/ folder and chroma_db/ are not touched.
+
+Usage (from disaster-insight-api/):
+    python scripts/benchmark_rag_ingest.py [--files 200] [--pages 10] [--workers 4]
+        [--batch-size 128] [--skip-embedding]
+"""
+import argparse
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import rag_service
+
+WORDS = ("evacuation shelter earthquake flood tsunami protocol emergency rescue first aid "
+         "water supply medical kit route assembly point warning siren aftershock hazard").split()
+
+
+def synthetic_pdf(pages: int, lines_per_page: int, rng: random.Random) -> bytes:
+    """A minimal multi-page PDF with Helvetica text, written by hand."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(lines_per_page)]
+        stream = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def time_extraction(docs: Path, workers: int):
+    jobs = [(p.name, str(p)) for p in sorted(docs.glob("*.pdf"))]
+    start = time.perf_counter()
+    chunks = sum(len(result[0]) for _, result, _ in rag_service._iter_extracted(jobs, workers))
+    return time.perf_counter() - start, len(jobs), chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--lines", type=int, default=50, help="Text lines per page")
+    parser.add_argument("--workers", type=int, default=rag_service.RAG_INGEST_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=rag_service.RAG_EMBED_BATCH_SIZE)
+    parser.add_argument("--skip-embedding", action="store_true", help="Only measure PDF extraction")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = Path(tmp) / "documents"
+        docs.mkdir()
+        rng = random.Random(0)
+        for i in range(args.files):
+            (docs / f"protocol_{i:05d}.pdf").write_bytes(synthetic_pdf(args.pages, args.lines, rng))
+        size_mb = sum(p.stat().st_size for p in docs.iterdir()) / 1e6
+        print(f"Synthetic corpus: {args.files} PDFs x {args.pages} pages ({size_mb:.1f} MB)")
+
+        print(f"\n{'extraction':12s} {'seconds':>8s} {'files/s':>8s} {'chunks':>7s}")
+        for label, workers in (("serial", 1), (f"{args.workers} procs", args.workers)):
+            seconds, files, chunks = time_extraction(docs, workers)
+            print(f"{label:12s} {seconds:8.2f} {files / seconds:8.1f} {chunks:7d}")
+
+        if args.skip_embedding:
+            return
+
+        import chromadb
+        client = chromadb.PersistentClient(path=str(Path(tmp) / "chroma"))
+        collection = client.get_or_create_collection(
+            name="benchmark",
+            embedding_function=rag_service.embedding_functions.SentenceTransformerEmbeddingFunction(
+                model_name=rag_service.EMBEDDING_MODEL_NAME
+            )
+        )
+        manifest = str(Path(tmp) / "manifest.json")
+        rss_before = peak_rss_mb()
+        report = rag_service.ingest_documents(
+            docs_path=str(docs), collection=collection, manifest_path=manifest,
+            workers=args.workers, batch_size=args.batch_size
+        )
+        chunks = report["chunks"]["added"]
+        print(f"\nFull ingest: {chunks} chunks in {report['seconds']:.1f}s "
+              f"({chunks / report['seconds']:.1f} chunks/s, {args.files / report['seconds']:.1f} files/s)")
+        print(f"Peak RSS: {peak_rss_mb():.0f} MB (before ingest: {rss_before:.0f} MB)")
+
+        report = rag_service.ingest_documents(docs_path=str(docs), collection=collection, manifest_path=manifest)
+        print(f"Re-run with nothing changed: {report['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
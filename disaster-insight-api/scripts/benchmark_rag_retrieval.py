@@ -0,0 +1,67 @@
+"""
+Query latency of the knowledge-base retrieval modes: lexical-only (BM25),
+vector-only (embedding + ANN search) and hybrid (BM25 fast path for keyword
+queries, otherwise BM25 + vector fused). Runs against the local chroma_db,
+so ingest documents first. Caches are bypassed so every query does the work.
+
+Usage (from disaster-insight-api/):
+    python scripts/benchmark_rag_retrieval.py [--rounds 20] [--n-results 2]
+"""
+import argparse
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import rag_service
+
+QUERIES = [
+    # keyword lookups
+    "earthquake kit", "flood evacuation", "tsunami evacuation", "CPR", "first aid", "wildfire smoke",
+    # natural-language questions
+    "What should I do if I am trapped under debris after an earthquake?",
+    "How much drinking water should a family store before a cyclone?",
+    "Is it safe to drive through a flooded road?",
+    "How do I help someone who is having a panic attack in a shelter?",
+]
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--n-results", type=int, default=2)
+    args = parser.parse_args()
+
+    # Measure the real work, not the caches
+    rag_service._query_embedding_cache = None
+    collection = rag_service.get_collection()
+    if rag_service.get_bm25_index() is None:
+        sys.exit("❌ Lexical index unavailable (RAG_RETRIEVAL_MODE=vector?)")
+    print(f"Knowledge base: {collection.count()} chunks, {len(QUERIES)} queries x {args.rounds} rounds")
+
+    for mode in ("lexical", "vector", "hybrid"):
+        rag_service.retrieve(QUERIES[0], args.n_results, mode=mode)  # warm-up (loads the embedder)
+
+    print(f"\n{'mode':8s} {'p50 ms':>8s} {'p99 ms':>8s} {'mean ms':>8s}  routes")
+    for mode in ("lexical", "vector", "hybrid"):
+        timings, routes = [], Counter()
+        for _ in range(args.rounds):
+            for query in QUERIES:
+                start = time.perf_counter()
+                route, _ = rag_service.retrieve(query, args.n_results, mode=mode)
+                timings.append(time.perf_counter() - start)
+                routes[route] += 1
+        timings.sort()
+        print(f"{mode:8s} {statistics.median(timings) * 1000:8.2f} {percentile(timings, 0.99) * 1000:8.2f} "
+              f"{statistics.mean(timings) * 1000:8.2f}  {dict(routes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Per-row cost of regional impact scoring: one predict_proba call per row
+(current /predict-regional-impact) vs. one vectorized call per batch.
+
+Usage (from disaster-insight-api/):
+    python scripts/benchmark_regional_batch.py [--sizes 1 100 10000] [--rounds 5]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from app.services.predictor import prediction_service
+
+
+def synthetic_rows(n: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    max_mag = rng.uniform(5.0, 8.5, n)
+    return [
+        {
+            "event_count": int(count),
+            "max_magnitude": float(mx),
+            "avg_magnitude": float(mx - gap),
+        }
+        for count, mx, gap in zip(rng.integers(0, 40, n), max_mag, rng.uniform(0.0, 1.5, n))
+    ]
+
+
+def best_of(fn, rounds: int):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--max-single-rows", type=int, default=2000,
+                        help="Cap for the per-row loop; larger sizes are extrapolated")
+    args = parser.parse_args()
+
+    if prediction_service.regional_forecaster is None:
+        sys.exit("Regional impact model could not be loaded.")
+
+    print(f"{'batch':>7s} {'single µs/row':>14s} {'batch µs/row':>13s} {'speed-up':>9s}")
+    for size in args.sizes:
+        rows = synthetic_rows(size)
+        looped = rows[:min(size, args.max_single_rows)]
+
+        single = best_of(
+            lambda: [prediction_service.predict_regional_impact(pd.DataFrame([r])) for r in looped],
+            args.rounds
+        ) / len(looped)
+        batch = best_of(lambda: prediction_service.predict_regional_impact_batch(rows), args.rounds) / size
+
+        # Parity: the vectorized call must return the same probabilities
+        expected = [prediction_service.predict_regional_impact(pd.DataFrame([r]))["high_impact_probability"] for r in looped[:50]]
+        actual = prediction_service.predict_regional_impact_batch(looped[:50])
+        assert expected == actual, "batch scores differ from single-row scores"
+
+        print(f"{size:7d} {single * 1e6:14.1f} {batch * 1e6:13.1f} {single / batch:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
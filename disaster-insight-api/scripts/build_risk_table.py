@@ -0,0 +1,34 @@
+"""
+(Re)builds the precomputed risk lookup table from the current risk pipeline.
+Run this after replacing xgb_risk_prediction_pipeline.joblib.
+
+Usage (from disaster-insight-api/):
+    python scripts/build_risk_table.py [--year 2026]
+"""
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import joblib
+
+from app.core.config import RISK_PIPELINE_PATH, RISK_TABLE_PATH, RISK_TABLE_CONTEXT
+from app.services.risk_table import build_risk_table, model_fingerprint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--year", type=int, default=datetime.now().year, help="Start year the table is built for")
+    parser.add_argument("--output", default=str(RISK_TABLE_PATH))
+    args = parser.parse_args()
+
+    pipeline = joblib.load(str(RISK_PIPELINE_PATH))
+    table = build_risk_table(pipeline, args.year, model_fingerprint(RISK_PIPELINE_PATH), RISK_TABLE_CONTEXT)
+    table.save(args.output)
+    print(f"✅ Saved risk lookup table to {args.output} ({table.stats()['memory_mb']} MB in memory)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Exports the DistilBERT tweet classifier to ONNX (+ int8 copy) and checks parity
+against the PyTorch pipeline.
+
+Usage (from disaster-insight-api/):
+    python scripts/export_nlp_onnx.py [--skip-export]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+
+from app.core.config import NLP_MODEL_PATH, NLP_ONNX_PATH, NLP_ONNX_INT8_PATH
+from app.services.nlp_onnx import OnnxTextClassifier, export_nlp_onnx, compare_classifiers
+
+SAMPLE_TEXTS = [
+    "Just felt a huge earthquake in Tokyo, so scary!",
+    "Help! Water entering house, we are stuck on the roof with two kids",
+    "Bridge on the highway collapsed after the flood, avoid route 7",
+    "Red Cross is collecting blankets and food donations at the city hall",
+    "Thoughts and prayers for everyone affected by the cyclone",
+    "Three people confirmed dead and dozens injured after the landslide",
+    "Missing: 8 year old boy last seen near the river camp, please share",
+    "Evacuation ordered for all coastal villages ahead of the storm surge",
+    "Power lines down across the north district, stay indoors",
+    "Great match last night, what a goal!",
+    "We urgently need drinking water and medicine at the shelter",
+    "Families displaced by the wildfire are staying at the school gym",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skip-export", action="store_true", help="Reuse existing ONNX files")
+    parser.add_argument("--no-int8", action="store_true", help="Do not produce the int8-quantized model")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        export_nlp_onnx(
+            NLP_MODEL_PATH,
+            NLP_ONNX_PATH,
+            quantized_path=None if args.no_int8 else NLP_ONNX_INT8_PATH
+        )
+
+    model_path_str = str(NLP_MODEL_PATH)
+    reference = pipeline(
+        "text-classification",
+        model=AutoModelForSequenceClassification.from_pretrained(model_path_str),
+        tokenizer=AutoTokenizer.from_pretrained(model_path_str)
+    )
+
+    candidates = [("onnx", NLP_ONNX_PATH)]
+    if not args.no_int8:
+        candidates.append(("onnx-int8", NLP_ONNX_INT8_PATH))
+
+    print("\n--- Parity vs. PyTorch pipeline ---")
+    for name, path in candidates:
+        report = compare_classifiers(reference, OnnxTextClassifier(NLP_MODEL_PATH, path), SAMPLE_TEXTS)
+        print(
+            f"{name:10s} label agreement: {report['label_agreement']:.1%}  "
+            f"max |Δscore|: {report['max_score_diff']:.5f}  "
+            f"mean |Δscore|: {report['mean_score_diff']:.5f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Exports the RAG embedder (all-MiniLM-L6-v2) to ONNX (+ int8 copy) and checks
+that its vectors match the sentence-transformers embedding function to within
+a cosine tolerance. Exits non-zero if a variant is out of tolerance.
+
+Usage (from disaster-insight-api/):
+    python scripts/export_rag_embedder.py [--skip-export] [--no-int8]
+        [--fp32-tolerance 1e-4] [--int8-tolerance 2e-2]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chromadb.utils import embedding_functions
+
+from app.core.config import RAG_EMBEDDER_DIR, RAG_EMBEDDER_ONNX_PATH, RAG_EMBEDDER_ONNX_INT8_PATH
+from app.services.rag_onnx import OnnxMiniLMEmbeddingFunction, compare_embedding_functions, export_minilm_onnx
+from app.services.rag_service import EMBEDDING_MODEL_NAME
+
+SAMPLE_TEXTS = [
+    "earthquake kit",
+    "flood evacuation",
+    "What should I do during a tsunami warning?",
+    "How do I perform CPR on an adult?",
+    "Drop, cover and hold on until the shaking stops. Stay away from windows and heavy furniture.",
+    "Move to higher ground immediately if you are in a coastal area and feel a strong earthquake.",
+    "Store at least one gallon of water per person per day for at least three days.",
+    "Do not walk or drive through flood waters; six inches of moving water can knock you down.",
+    "Turn off utilities if instructed to do so, and disconnect electrical appliances.",
+    "Wildfire smoke: keep windows closed and use a HEPA filter if available.",
+    # A long chunk, to exercise truncation at the model's sequence limit
+    " ".join(["Shelter in place procedures for chemical spills and hazardous material releases."] * 40),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skip-export", action="store_true", help="Reuse existing ONNX files")
+    parser.add_argument("--no-int8", action="store_true", help="Do not produce the int8-quantized model")
+    parser.add_argument("--fp32-tolerance", type=float, default=1e-4, help="Max allowed 1 - cosine for fp32")
+    parser.add_argument("--int8-tolerance", type=float, default=2e-2, help="Max allowed 1 - cosine for int8")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        export_minilm_onnx(
+            RAG_EMBEDDER_DIR,
+            RAG_EMBEDDER_ONNX_PATH,
+            quantized_path=None if args.no_int8 else RAG_EMBEDDER_ONNX_INT8_PATH
+        )
+
+    reference = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL_NAME)
+    candidates = [("onnx", RAG_EMBEDDER_ONNX_PATH, args.fp32_tolerance)]
+    if not args.no_int8:
+        candidates.append(("onnx-int8", RAG_EMBEDDER_ONNX_INT8_PATH, args.int8_tolerance))
+
+    print("\n--- Parity vs. sentence-transformers ---")
+    failed = False
+    for name, path, tolerance in candidates:
+        report = compare_embedding_functions(reference, OnnxMiniLMEmbeddingFunction(RAG_EMBEDDER_DIR, path), SAMPLE_TEXTS)
+        ok = 1 - report["min_cosine"] <= tolerance
+        failed |= not ok
+        print(f"{name:10s} min cosine: {report['min_cosine']:.6f}  mean cosine: {report['mean_cosine']:.6f}  "
+              f"tolerance: {tolerance:g}  {'✅' if ok else '❌'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Load test: concurrent /chat/ask throughput, and /health latency meanwhile.
+
+Each client keeps its own conversation and cycles through a fixed set of
+prompts that exercise every agent tool. Run it against the API started with
+the local fake LLM backend to benchmark offline (no API key, no network):
+
+    AGENT_LLM_BACKEND=fake AGENT_FAKE_LATENCY_MS=200 uvicorn main:app
+
+then from disaster-insight-api/:
+    python scripts/load_test_chat_agent.py [--url http://127.0.0.1:8000] [--clients 16] [--seconds 20]
+
+With the agent on worker threads, /health stays fast and throughput grows
+with --clients up to AGENT_LLM_WORKERS; if turns blocked the event loop,
+both would collapse to one turn at a time.
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+PROMPTS = [
+    "What is the flood risk in Pakistan?",
+    "How should I prepare an earthquake kit?",
+    "Help! Water is entering our house and the road is gone",
+    "Give me the global earthquake forecast",
+    "What is the storm risk for Japan?",
+    "What should I do after a wildfire evacuation order?",
+]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))] if ordered else float("nan")
+
+
+def poll_health(host, port, stop, latencies):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.request("GET", "/health")
+        conn.getresponse().read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.05)
+    conn.close()
+
+
+def chat_client(host, port, stop, offset, latencies, counters, lock):
+    conn = http.client.HTTPConnection(host, port, timeout=120)
+    conversation_id = uuid.uuid4().hex
+    turn = offset
+    while not stop.is_set():
+        body = json.dumps({"message": PROMPTS[turn % len(PROMPTS)], "conversation_id": conversation_id})
+        start = time.perf_counter()
+        conn.request("POST", "/api/v1/chat/ask", body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            counters[response.status] = counters.get(response.status, 0) + 1
+            if response.status == 200:
+                latencies.append(elapsed)
+        turn += 1
+    conn.close()
+
+
+def run_load(host, port, clients, seconds):
+    stop, lock = threading.Event(), threading.Lock()
+    health, chat, counters = [], [], {}
+    threads = [threading.Thread(target=poll_health, args=(host, port, stop, health))]
+    threads += [
+        threading.Thread(target=chat_client, args=(host, port, stop, i, chat, counters, lock))
+        for i in range(clients)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return health, chat, counters, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=20)
+    args = parser.parse_args()
+
+    target = urlparse(args.url)
+    host, port = target.hostname, target.port or 80
+
+    print(f"Load: {args.clients} conversations calling /chat/ask for {args.seconds:.0f}s...")
+    health, chat, counters, elapsed = run_load(host, port, args.clients, args.seconds)
+
+    print(f"\n{'endpoint':10s} {'n':>6s} {'p50 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}")
+    for name, values in (("chat/ask", chat), ("health", health)):
+        if values:
+            print(f"{name:10s} {len(values):6d} {statistics.median(values):9.1f} "
+                  f"{percentile(values, 0.99):9.1f} {max(values):9.1f}")
+    print(f"\nThroughput: {len(chat) / elapsed:.2f} answered turns/s")
+    print(f"/chat/ask responses by status: {counters}")
+
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.request("GET", "/api/v1/chat/sessions/stats")
+    stats = json.loads(conn.getresponse().read())
+    conn.close()
+    print(f"Agent backend: {stats.get('backend')}, executor: {stats.get('executor')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Load test: /health latency while /analyze-damage is busy.
+
+Polls /health on its own while several clients keep uploading large synthetic
+photos. If CV work blocked the event loop, /health latency would climb to the
+image processing time; with the CV executor it should stay flat.
+
+Start the API first (uvicorn main:app), then from disaster-insight-api/:
+    python scripts/load_test_cv_event_loop.py [--url http://127.0.0.1:8000] [--clients 8] [--seconds 20]
+"""
+import argparse
+import http.client
+import io
+import statistics
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+import numpy as np
+from PIL import Image
+
+
+def synthetic_jpeg(width: int = 4000, height: int = 3000) -> bytes:
+    """A phone-sized noisy JPEG, expensive to decode and resize."""
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def multipart_body(image: bytes):
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="load_test.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    return head + image + tail, f"multipart/form-data; boundary={boundary}"
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))] if ordered else float("nan")
+
+
+def poll_health(host, port, stop, latencies):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.request("GET", "/health")
+        conn.getresponse().read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.05)
+    conn.close()
+
+
+def upload_images(host, port, stop, body, content_type, counters):
+    conn = http.client.HTTPConnection(host, port, timeout=120)
+    while not stop.is_set():
+        conn.request("POST", "/api/v1/analyze-damage", body=body, headers={"Content-Type": content_type})
+        response = conn.getresponse()
+        response.read()
+        counters[response.status] = counters.get(response.status, 0) + 1
+    conn.close()
+
+
+def measure_health(host, port, seconds, uploaders=0, body=None, content_type=None):
+    stop = threading.Event()
+    latencies, counters = [], {}
+    threads = [threading.Thread(target=poll_health, args=(host, port, stop, latencies))]
+    threads += [
+        threading.Thread(target=upload_images, args=(host, port, stop, body, content_type, counters))
+        for _ in range(uploaders)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return latencies, counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=20)
+    args = parser.parse_args()
+
+    target = urlparse(args.url)
+    host, port = target.hostname, target.port or 80
+    body, content_type = multipart_body(synthetic_jpeg())
+
+    print(f"Baseline: polling /health for {args.seconds / 2:.0f}s with no image load...")
+    idle, _ = measure_health(host, port, args.seconds / 2)
+    print(f"Load: polling /health for {args.seconds:.0f}s with {args.clients} clients uploading images...")
+    busy, counters = measure_health(host, port, args.seconds, args.clients, body, content_type)
+
+    print(f"\n{'phase':9s} {'n':>5s} {'p50 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    for phase, values in (("idle", idle), ("loaded", busy)):
+        print(f"{phase:9s} {len(values):5d} {statistics.median(values):8.2f} "
+              f"{percentile(values, 0.99):8.2f} {max(values):8.2f}")
+    print(f"\n/analyze-damage responses by status: {counters}")
+
+
+if __name__ == "__main__":
+    main()
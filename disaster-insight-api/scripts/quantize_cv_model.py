@@ -0,0 +1,76 @@
+"""
+Builds the statically int8-quantized damage classifier from a calibration set
+of local images and runs a quick top-1 agreement check against fp32.
+Serve it with CV_MODEL_PRECISION=int8; run scripts/benchmark_cv_int8.py for the
+full accuracy / latency / memory regression report.
+
+Calibration images should cover all five damage classes. A folder per class
+(as used for training) works; any nested layout is searched recursively.
+
+Usage (from disaster-insight-api/):
+    python scripts/quantize_cv_model.py --calibration-dir path/to/images [--max-images 300]
+        [--method minmax|entropy|percentile] [--no-per-channel]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import onnxruntime as ort
+
+from app.services.cv_service import (
+    DamageAssessmentService,
+    IMAGE_EXTENSIONS,
+    MODEL_PATH,
+    MODEL_INT8_PATH,
+    MODEL_INT8_UINT8_PATH
+)
+from app.services.cv_quantization import (
+    CALIBRATION_METHODS,
+    find_images,
+    iter_image_batches,
+    quantize_cv_static
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calibration-dir", required=True, type=Path)
+    parser.add_argument("--max-images", type=int, default=300)
+    parser.add_argument("--method", choices=sorted(CALIBRATION_METHODS), default="minmax")
+    parser.add_argument("--no-per-channel", action="store_true", help="Per-tensor weight quantization")
+    args = parser.parse_args()
+
+    paths = find_images(args.calibration_dir, IMAGE_EXTENSIONS, args.max_images)
+    print(f"Found {len(paths)} calibration images in {args.calibration_dir}")
+
+    decode = DamageAssessmentService()._decode_image
+    reference = ort.InferenceSession(str(MODEL_PATH), providers=["CPUExecutionProvider"])
+    input_name = reference.get_inputs()[0].name
+
+    quantize_cv_static(
+        MODEL_PATH,
+        MODEL_INT8_PATH,
+        paths,
+        decode,
+        input_name,
+        method=args.method,
+        per_channel=not args.no_per_channel
+    )
+    # A stale uint8-input wrapper would still point at the previous int8 weights
+    MODEL_INT8_UINT8_PATH.unlink(missing_ok=True)
+
+    candidate = ort.InferenceSession(str(MODEL_INT8_PATH), providers=["CPUExecutionProvider"])
+    total = agree = 0
+    for _, batch in iter_image_batches(paths, decode):
+        ref = reference.run(None, {input_name: batch})[0].argmax(axis=1)
+        cand = candidate.run(None, {input_name: batch})[0].argmax(axis=1)
+        total += len(ref)
+        agree += int((ref == cand).sum())
+    print(f"Top-1 agreement with fp32 on the calibration set: {agree}/{total} ({agree / max(total, 1):.2%})")
+    print(f"Model size: fp32 {MODEL_PATH.stat().st_size / 1e6:.1f} MB, int8 {MODEL_INT8_PATH.stat().st_size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()